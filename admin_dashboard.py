@@ -14,7 +14,9 @@ import plotly.graph_objects as go
 # Add src path
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from storage_utils import get_storage
+from storage_utils import get_storage, list_businesses, create_business
+from aspect_analytics import AspectIndex, TEXT_FIELDS
+from search_index import ReviewSearchIndex
 
 st.set_page_config(
     page_title="Admin Dashboard - Yelp Reviews",
@@ -23,7 +25,53 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-storage = get_storage()
+
+
+# One index per business, kept across reruns; update() only re-tokenizes
+# new or rewritten reviews. Bounded so a worker holds at most 16 businesses;
+# evicted ones are rebuilt on their next visit.
+@st.cache_resource(max_entries=16)
+def get_aspect_index(business_id):
+    return AspectIndex()
+
+
+@st.cache_resource(max_entries=16)
+def get_search_index(business_id):
+    return ReviewSearchIndex()
+
+
+# ---------------- BUSINESS ----------------
+with st.sidebar:
+    st.markdown("## 🏢 Business")
+    business_options = [None] + list_businesses()
+    requested = st.query_params.get("business")
+    business_id = st.selectbox(
+        "Business",
+        business_options,
+        index=business_options.index(requested) if requested in business_options else 0,
+        format_func=lambda b: b or "Default",
+    )
+
+    # Customer links only work for registered businesses
+    with st.expander("➕ Add business"):
+        new_business = st.text_input("Business id", help="lowercase letters, digits, - and _")
+        if st.button("Create") and new_business:
+            try:
+                if create_business(new_business):
+                    st.success(f"✅ Created. Customer link: ?business={new_business}")
+                else:
+                    st.error("❌ Could not create the business.")
+            except ValueError:
+                st.error("❌ Invalid business id.")
+
+if business_id:
+    st.query_params["business"] = business_id
+elif "business" in st.query_params:
+    del st.query_params["business"]
+
+# Only this business's partition is loaded and scanned
+storage = get_storage(business_id)
+
 
 # Style
 st.markdown("""
@@ -49,8 +97,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.title("📊 Admin Dashboard - Yelp Review Analytics")
+if business_id:
+    st.caption(f"Business: {business_id}")
 
 analytics = storage.get_analytics()
+reviews = storage.get_all_reviews()
 
 # ---------------- OVERVIEW ----------------
 st.markdown("## 📈 Overview")
@@ -128,11 +179,73 @@ if analytics['total_reviews'] > 0:
                 st.plotly_chart(fig2, width="stretch")
 
 
+# ---------------- ASPECT ANALYTICS ----------------
+if reviews:
+    st.markdown("## 🔎 Aspect Analytics")
+
+    aspect_index = get_aspect_index(business_id)
+    aspect_index.update(reviews)
+
+    c1, c2 = st.columns(2)
+
+    # Share of each rating bucket mentioning an aspect
+    with c1:
+        by_rating = aspect_index.aspect_by_rating()
+        rows = [
+            {"Rating": f"{stars}⭐", "Aspect": aspect, "Share": by_rating["share"][stars - 1][j]}
+            for stars in range(1, 6)
+            for j, aspect in enumerate(by_rating["aspects"])
+        ]
+        fig3 = px.bar(
+            pd.DataFrame(rows), x="Aspect", y="Share", color="Rating",
+            barmode="group", title="Aspect Mentions by Rating",
+        )
+        fig3.update_yaxes(tickformat=".0%")
+        st.plotly_chart(fig3, width="stretch")
+
+    # Aspect mentions over time
+    with c2:
+        freq = st.radio("Period", ["D", "W", "M"], index=1, horizontal=True,
+                        format_func=lambda f: {"D": "Day", "W": "Week", "M": "Month"}[f])
+        over_time = aspect_index.aspect_over_time(freq)
+        if len(over_time["periods"]):
+            rows = [
+                {"Period": period, "Aspect": aspect, "Reviews": over_time["counts"][i][j]}
+                for i, period in enumerate(pd.to_datetime(over_time["periods"]))
+                for j, aspect in enumerate(over_time["aspects"])
+            ]
+            fig4 = px.line(
+                pd.DataFrame(rows), x="Period", y="Reviews", color="Aspect",
+                markers=True, title="Aspect Mentions Over Time",
+            )
+            st.plotly_chart(fig4, width="stretch")
+
+    # Top terms per rating bucket
+    t1, t2 = st.columns([1, 3])
+    with t1:
+        term_rating = st.selectbox("Top terms for rating", [1, 2, 3, 4, 5],
+                                   format_func=lambda x: f"{x}⭐")
+        term_field = st.selectbox(
+            "Text source", [None] + list(TEXT_FIELDS),
+            format_func=lambda f: {None: "Reviews + AI actions",
+                                   "user_review": "User reviews",
+                                   "ai_recommended_action": "AI recommended actions"}[f],
+        )
+    with t2:
+        top = aspect_index.top_terms_by_rating(15, field=term_field).get(term_rating, [])
+        if top:
+            terms_df = pd.DataFrame(top, columns=["Term", "Count"])
+            fig5 = px.bar(terms_df, x="Count", y="Term", orientation="h",
+                          title=f"Top Terms in {term_rating}⭐ Reviews")
+            fig5.update_yaxes(autorange="reversed")
+            st.plotly_chart(fig5, width="stretch")
+        else:
+            st.info("No terms for this rating yet.")
+
+
 # ---------------- REVIEW LIST ----------------
 st.markdown("## 📝 All Reviews")
 
-reviews = storage.get_all_reviews()
-
 if reviews:
     df = pd.DataFrame(reviews)
 
@@ -142,7 +255,11 @@ if reviews:
         rating_filter = st.selectbox("Filter by Rating", ["All"] + list(range(1, 6)))
 
     with f2:
-        search = st.text_input("Search reviews")
+        search = st.text_input(
+            "Search reviews",
+            help="Matches whole words by prefix: every term must start a word "
+                 "in the review or its AI summary, in any order.",
+        )
 
     with f3:
         show_ai = st.checkbox("Show AI Analysis")
@@ -153,10 +270,17 @@ if reviews:
         filtered = filtered[filtered["user_rating"] == rating_filter]
 
     if search:
-        filtered = filtered[
-            filtered["user_review"].str.contains(search, case=False, na=False)
-            | filtered["ai_summary"].str.contains(search, case=False, na=False)
-        ]
+        search_index = get_search_index(business_id)
+        search_index.update(reviews)
+        positions = search_index.search(search)
+        if positions is None:
+            # No word characters to index (e.g. "!"): plain substring match
+            filtered = filtered[
+                filtered["user_review"].str.contains(search, case=False, na=False, regex=False)
+                | filtered["ai_summary"].str.contains(search, case=False, na=False, regex=False)
+            ]
+        else:
+            filtered = filtered[filtered.index.isin(positions)]
 
     st.info(f"Showing {len(filtered)} of {len(df)} reviews")
 
@@ -185,13 +309,11 @@ if reviews:
 
     with c1:
         if st.button("Export CSV"):
-            path = "export.csv"
-            if storage.export_to_csv(path):
-                with open(path, "rb") as f:
-                    st.download_button("Download CSV", f.read(), "yelp_reviews.csv", "text/csv")
-                st.success("Ready!")
-            else:
-                st.error("Failed.")
+            # Built in memory: a shared file on disk could hand one admin
+            # another business's export when sessions overlap
+            csv = pd.DataFrame(reviews).to_csv(index=False)
+            st.download_button("Download CSV", csv, "yelp_reviews.csv", "text/csv")
+            st.success("Ready!")
 
     with c2:
         if st.button("Export JSON"):
@@ -0,0 +1,86 @@
+"""
+Time aspect analytics at dashboard scale on synthetic reviews.
+
+Indexing cost is paid once per review (incremental); the query stage is
+what every admin page load runs.
+
+    python benchmarks/bench_aspect_analytics.py --reviews 100000
+"""
+
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from aspect_analytics import AspectIndex, ASPECTS
+
+
+FILLER = (
+    "the food was really good but the place felt a bit off tonight we came "
+    "with friends for dinner and ordered pasta pizza salad dessert coffee"
+).split()
+
+
+def synthetic_reviews(n, seed=0):
+    rng = random.Random(seed)
+    aspect_terms = [t for terms in ASPECTS.values() for t in terms]
+    start = datetime(2024, 1, 1)
+    # Long tail of rare tokens so the vocabulary grows like real text
+    rare = [f"dish{i}" for i in range(20000)]
+    reviews = []
+    for i in range(n):
+        words = rng.choices(FILLER, k=rng.randint(15, 60))
+        words += rng.choices(aspect_terms, k=rng.randint(1, 4))
+        words += rng.choices(rare, k=2)
+        rng.shuffle(words)
+        reviews.append({
+            "user_rating": rng.randint(1, 5),
+            "user_review": " ".join(words),
+            "ai_recommended_action": "Improve " + " ".join(rng.choices(aspect_terms, k=3)),
+            "timestamp": (start + timedelta(minutes=7 * i)).isoformat(),
+        })
+    return reviews
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<34} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--increment", type=int, default=100)
+    args = parser.parse_args()
+
+    reviews = synthetic_reviews(args.reviews + args.increment)
+    index = AspectIndex()
+
+    timed(f"initial index ({args.reviews} reviews)", lambda: index.update(reviews[:args.reviews]))
+    timed(f"incremental update (+{args.increment})", lambda: index.update(reviews))
+    timed("rerun, nothing changed", lambda: index.update(reviews))
+    # Re-enrichment rewrites a field in place in scattered rows, early ones too
+    for i in range(0, len(reviews), len(reviews) // 20):
+        reviews[i]["ai_recommended_action"] = "Improve service speed"
+    timed("rewrite 20 scattered rows", lambda: index.update(reviews))
+    reviews[5]["user_review"] += " slow"
+    timed("rewrite row 5", lambda: index.update(reviews))
+    print(f"terms={len(index.terms)} nnz={index.matrix().nnz}")
+
+    def queries():
+        index.top_terms_by_rating(10)
+        index.aspect_by_rating()
+        index.aspect_over_time("W")
+
+    timed("query stage (first, builds CSR)", queries)
+    timed("query stage (warm)", queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare per-review vs batched LLM enrichment (summary + recommendation).
+
+Reports model requests, tokens per review and throughput for both paths.
+Requires GEMINI_API_KEY.
+
+    python benchmarks/bench_batch_enrichment.py --limit 50 --token-budget 6000
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+from llm_utils import LLMManager
+
+
+def load_reviews(path, limit):
+    with open(path) as f:
+        data = json.load(f)
+    return [
+        {"rating": r["user_rating"], "review_text": r["user_review"]}
+        for r in data[:limit]
+    ]
+
+
+def report(name, llm, n, elapsed):
+    u = llm.usage
+    tokens = u["prompt_tokens"] + u["output_tokens"]
+    print(f"{name:<12} requests={u['requests']:<5} "
+          f"failed={u['failed_requests']:<3} "
+          f"tokens/review={tokens / n:8.1f} "
+          f"requests/review={u['requests'] / n:5.2f} "
+          f"reviews/s={n / elapsed:6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reviews", default=str(project_root / "reviews.json"))
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--token-budget", type=int, default=6000)
+    args = parser.parse_args()
+
+    reviews = load_reviews(args.reviews, args.limit)
+    n = len(reviews)
+    if not n:
+        print("No reviews to benchmark.")
+        return
+
+    # Cache hits skip the usage counters; measure real requests only
+    llm = LLMManager(use_cache=False)
+    if not llm.model:
+        print("GEMINI_API_KEY not set, nothing to measure.")
+        return
+
+    start = time.perf_counter()
+    for r in reviews:
+        llm.generate_summary(r["rating"], r["review_text"])
+        llm.generate_recommendation(r["rating"], r["review_text"])
+    report("per-review", llm, n, time.perf_counter() - start)
+
+    llm.reset_usage()
+    start = time.perf_counter()
+    llm.process_reviews_batch(reviews, token_budget=args.token_budget)
+    report("batched", llm, n, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Per-business admin page-load time as the number of tenants grows.
+
+Builds a local partitioned store (FYND_STORAGE_DIR) with T businesses of
+M reviews each, then times what the admin dashboard does for one
+business: list the businesses (the sidebar selector, on every rerun),
+load its snapshot and analytics, build its aspect and search
+indexes, run the aspect queries and a search. Cold = empty shared cache
+and fresh indexes; warm = second load served from the cache.
+
+    python benchmarks/bench_tenants.py --tenants 1,10,100,1000 --reviews 200
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+# Must be set before storage_utils is imported
+WORK_DIR = tempfile.mkdtemp(prefix="fynd_tenants_")
+os.environ["FYND_STORAGE_DIR"] = os.path.join(WORK_DIR, "store")
+os.environ["FYND_CACHE_PATH"] = os.path.join(WORK_DIR, "cache.sqlite3")
+
+from storage_utils import BUSINESS_DIR, FILE_PATH, get_storage, list_businesses
+from shared_cache import get_shared_cache
+from aspect_analytics import AspectIndex
+from search_index import ReviewSearchIndex
+
+
+def write_tenants(n_tenants, n_reviews, base):
+    """Add partitions up to n_tenants (earlier ones are reused)."""
+    root = os.path.join(os.environ["FYND_STORAGE_DIR"], BUSINESS_DIR)
+    rng = random.Random(0)
+    for t in range(n_tenants):
+        path = os.path.join(root, f"biz-{t:05d}", FILE_PATH)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        reviews = []
+        for i in range(n_reviews):
+            r = dict(rng.choice(base))
+            r["id"] = i + 1
+            reviews.append(r)
+        with open(path, "w") as f:
+            json.dump(reviews, f)
+
+
+def page_load(business_id):
+    assert business_id in list_businesses()
+    storage = get_storage(business_id)
+    analytics = storage.get_analytics()
+    reviews = storage.get_all_reviews()
+
+    aspects = AspectIndex()
+    aspects.update(reviews)
+    aspects.aspect_by_rating()
+    aspects.aspect_over_time("W")
+    aspects.top_terms_by_rating(15)
+
+    search = ReviewSearchIndex()
+    search.update(reviews)
+    search.search("service slow")
+    return analytics["total_reviews"]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenants", default="1,10,100,1000")
+    parser.add_argument("--reviews", type=int, default=200, help="reviews per business")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(project_root / "reviews.json") as f:
+        base = json.load(f)
+
+    print(f"{'tenants':>8} {'total reviews':>14} {'cold ms':>9} {'warm ms':>9}")
+    try:
+        for n in [int(t) for t in args.tenants.split(",")]:
+            write_tenants(n, args.reviews, base)
+            cache = get_shared_cache()
+            # Partitions were written behind storage_utils' back
+            cache.clear()
+            target = list_businesses()[n // 2]
+
+            def cold():
+                cache.clear()
+                page_load(target)
+
+            cold_s = timed(cold, args.repeat)
+            page_load(target)
+            warm_s = timed(lambda: page_load(target), args.repeat)
+            print(f"{n:>8} {n * args.reviews:>14} {cold_s * 1000:>9.1f} {warm_s * 1000:>9.1f}")
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Load test: dashboard sessions per second vs number of worker processes.
+
+Each worker process renders full dashboard sessions in a loop with
+Streamlit's AppTest (the whole script: storage load, analytics, pandas
+filtering, review cards). Storage points at a temporary FYND_STORAGE_DIR
+holding the seeded reviews (so the business listing and any cache miss
+stay local, and no network calls are made), and all workers share one
+SQLite cache seeded with the same snapshot.
+
+    python benchmarks/load_test_dashboards.py --workers 1,2,4 --reviews 500
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root / "src"))
+
+
+def worker(app, duration, barrier, results):
+    from streamlit.testing.v1 import AppTest
+
+    # Warm-up session: imports, cache_resource objects, first cache fill
+    AppTest.from_file(app, default_timeout=120).run()
+    barrier.wait()
+
+    sessions = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        at = AppTest.from_file(app, default_timeout=120).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        sessions += 1
+    results.put(sessions)
+
+
+def seed(storage_dir, cache_path, n_reviews):
+    """Write an n-review store built from reviews.json and cache its snapshot."""
+    # Imported here: storage_utils reads FYND_STORAGE_DIR at import time
+    from shared_cache import SharedCache
+    from storage_utils import FILE_PATH
+
+    with open(project_root / "reviews.json") as f:
+        base = json.load(f)
+    reviews = []
+    for i in range(n_reviews):
+        r = dict(base[i % len(base)])
+        r["id"] = i + 1
+        reviews.append(r)
+
+    with open(os.path.join(storage_dir, FILE_PATH), "w") as f:
+        json.dump(reviews, f)
+
+    cache = SharedCache(cache_path)
+    cache.clear()
+    cache.set("snapshot", FILE_PATH, reviews)
+
+
+def run(app, n_workers, duration):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(app, duration, barrier, results))
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+    total = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return total / duration
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default=str(project_root / "admin_dashboard.py"))
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--reviews", type=int, default=500)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    storage_dir = os.path.join(tmp, "storage")
+    os.makedirs(storage_dir)
+    cache_path = os.path.join(tmp, "load_test_cache.sqlite3")
+    # Set before seeding and spawning: workers inherit the environment
+    os.environ["FYND_STORAGE_DIR"] = storage_dir
+    os.environ["FYND_CACHE_PATH"] = cache_path
+    # Never expire the seeded snapshot during the run
+    os.environ["FYND_SNAPSHOT_TTL"] = "1e9"
+    seed(storage_dir, cache_path, args.reviews)
+
+    baseline = None
+    print(f"{'workers':>7} {'sessions/s':>11} {'speedup':>8}")
+    for n in [int(w) for w in args.workers.split(",")]:
+        rate = run(args.app, n, args.duration)
+        baseline = baseline or rate
+        print(f"{n:>7} {rate:>11.2f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Run N Streamlit worker processes for one dashboard behind a load balancer.
+
+Every worker gets the same FYND_CACHE_PATH, so the review snapshot,
+analytics and LLM responses are computed once and shared (see
+src/shared_cache.py). Put a sticky load balancer in front of the ports
+(see DEPLOYMENT.md); Streamlit sessions live on one websocket.
+
+    python serve_dashboards.py admin_dashboard.py --workers 4 --base-port 8601
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from shared_cache import DEFAULT_CACHE_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run N dashboard worker processes")
+    parser.add_argument("app", help="e.g. admin_dashboard.py or user_dashboard.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--base-port", type=int, default=8601)
+    parser.add_argument("--cache-path", default=os.getenv("FYND_CACHE_PATH", DEFAULT_CACHE_PATH))
+    args = parser.parse_args()
+
+    env = dict(os.environ, FYND_CACHE_PATH=args.cache_path)
+    procs = []
+    for i in range(args.workers):
+        port = args.base_port + i
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", args.app,
+             "--server.port", str(port), "--server.headless", "true"],
+            env=env,
+        ))
+        print(f"worker {i} -> http://localhost:{port}")
+
+    def stop(*_):
+        for p in procs:
+            p.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Exit (and take the rest down) as soon as any worker dies
+    while all(p.poll() is None for p in procs):
+        time.sleep(1)
+    stop()
+    for p in procs:
+        p.wait()
+
+
+if __name__ == "__main__":
+    main()
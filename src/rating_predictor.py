@@ -0,0 +1,301 @@
+"""
+Local star-rating pre-predictor for the Task 1 evaluation.
+
+Two NumPy models with the same interface, predict(texts) -> (stars, confidence):
+- LexiconRatingModel: sentiment lexicon with negation/intensifier handling,
+  needs no training data
+- LinearRatingModel: multinomial logistic regression on hashed terms,
+  trained on yelp_reviews_export.csv-style data (text + stars)
+
+CascadePredictor keeps high-confidence predictions local and only sends
+ambiguous reviews to the LLM templates. evaluate_cascade() replays that
+policy offline over already-collected LLM predictions (pick_threshold
+chooses from it); threshold_for_accuracy picks a threshold from local
+predictions alone, e.g. on a held-out slice. The confidences of the two
+models are on different scales, so each model carries its own THRESHOLDS.
+"""
+
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from text_utils import tokenize, terms
+
+
+# ---------- LEXICON MODEL ---------- #
+
+POSITIVE = {
+    "amazing": 2.0, "awesome": 2.0, "excellent": 2.0, "outstanding": 2.0,
+    "perfect": 2.0, "fantastic": 2.0, "incredible": 2.0, "best": 2.0,
+    "love": 1.5, "loved": 1.5, "wonderful": 1.5, "delicious": 1.5,
+    "superb": 1.5, "phenomenal": 2.0, "favorite": 1.5, "great": 1.0,
+    "good": 0.7, "nice": 0.7, "friendly": 0.8, "fresh": 0.7, "tasty": 0.8,
+    "recommend": 1.0, "enjoyed": 1.0, "attentive": 0.8, "pleasant": 0.8,
+    "flavorful": 0.8, "helpful": 0.7, "cozy": 0.6, "clean": 0.5,
+    "generous": 0.6, "impressed": 1.0, "happy": 0.8, "beautiful": 0.8,
+}
+
+NEGATIVE = {
+    "terrible": 2.0, "horrible": 2.0, "awful": 2.0, "worst": 2.0,
+    "disgusting": 2.0, "inedible": 2.0, "rude": 1.5, "disappointing": 1.2,
+    "disappointed": 1.2, "bad": 1.0, "poor": 1.0, "cold": 0.6,
+    "bland": 0.8, "slow": 0.6, "dirty": 1.2, "overpriced": 1.0,
+    "mediocre": 0.8, "waste": 1.2, "avoid": 1.5, "sick": 1.5, "gross": 1.5,
+    "unprofessional": 1.2, "ignored": 1.0, "stale": 0.8, "soggy": 0.8,
+    "undercooked": 1.0, "burnt": 0.8, "lukewarm": 0.6, "meh": 0.6,
+}
+
+# "never" is deliberately only a negator ("never disappointed" is praise),
+# not a negative word; a lexicon entry for it would never be reached
+NEGATORS = frozenset(["not", "no", "never", "hardly", "barely", "without"])
+INTENSIFIERS = frozenset(["very", "really", "so", "extremely", "super", "absolutely", "truly"])
+
+# How many tokens after a negator/intensifier it still applies to
+SCOPE = 3
+
+
+class LexiconRatingModel:
+    """Rule-based rating from a signed sentiment lexicon.
+
+    Confidence is |polarity| damped by how much sentiment the text holds,
+    so it rarely gets near 1; the sweep starts low accordingly.
+    """
+
+    THRESHOLDS = (0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8)
+    DEFAULT_THRESHOLD = 0.6
+
+    def __init__(self, positive: Optional[Dict[str, float]] = None,
+                 negative: Optional[Dict[str, float]] = None):
+        self.weights = dict(positive or POSITIVE)
+        for word, w in (negative or NEGATIVE).items():
+            self.weights[word] = -w
+
+    def score(self, text: str) -> Tuple[float, float]:
+        """(positive mass, negative mass) for one review."""
+        pos = neg = 0.0
+        negate_left = boost_left = 0
+        for tok in tokenize(text):
+            if tok in NEGATORS or tok.endswith("n't"):
+                negate_left = SCOPE
+                continue
+            if tok in INTENSIFIERS:
+                boost_left = SCOPE
+                continue
+            w = self.weights.get(tok)
+            if w is not None:
+                if boost_left:
+                    w *= 1.5
+                if negate_left:
+                    w = -0.5 * w
+                if w > 0:
+                    pos += w
+                else:
+                    neg -= w
+            negate_left = max(negate_left - 1, 0)
+            boost_left = max(boost_left - 1, 0)
+        return pos, neg
+
+    def predict(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        masses = np.array([self.score(t) for t in texts], dtype=float).reshape(-1, 2)
+        pos, neg = masses[:, 0], masses[:, 1]
+        total = pos + neg
+        polarity = np.divide(pos - neg, total, out=np.zeros_like(total), where=total > 0)
+        stars = np.clip(np.rint(3 + 2 * polarity), 1, 5).astype(int)
+        # Confident only when the text is one-sided *and* says enough
+        confidence = np.abs(polarity) * (1 - np.exp(-total / 2))
+        return stars, confidence
+
+
+# ---------- LINEAR MODEL ---------- #
+
+def _hash_features(texts: Sequence[str], n_features: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sparse hashed term counts as (rows, cols, values) arrays."""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        for term in terms(text):
+            rows.append(i)
+            cols.append(zlib.crc32(term.encode("utf-8")) % n_features)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    # Each occurrence weighted by 1/sqrt(review length)
+    lengths = np.bincount(rows, minlength=len(texts)).astype(float)
+    values = 1.0 / np.sqrt(np.maximum(lengths[rows], 1.0))
+    return rows, cols, values
+
+
+class LinearRatingModel:
+    """Multinomial logistic regression over hashed unigram/bigram counts.
+
+    Confidence is the max softmax probability, which is at least 0.2.
+    """
+
+    THRESHOLDS = (0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+    DEFAULT_THRESHOLD = 0.7
+
+    def __init__(self, n_features: int = 2 ** 15, l2: float = 1e-4,
+                 lr: float = 0.5, epochs: int = 200):
+        self.n_features = n_features
+        self.l2 = l2
+        self.lr = lr
+        self.epochs = epochs
+        self.W = np.zeros((n_features, 5))
+        self.b = np.zeros(5)
+
+    def _logits(self, rows, cols, values, n) -> np.ndarray:
+        logits = np.empty((n, 5))
+        for c in range(5):
+            logits[:, c] = np.bincount(rows, weights=values * self.W[cols, c], minlength=n)
+        return logits + self.b
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        z = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def fit(self, texts: Sequence[str], stars: Sequence[int]) -> "LinearRatingModel":
+        texts = list(texts)
+        y = np.asarray(stars, dtype=int) - 1
+        n = len(texts)
+        rows, cols, values = _hash_features(texts, self.n_features)
+        onehot = np.eye(5)[y]
+
+        for _ in range(self.epochs):
+            grad = (self._softmax(self._logits(rows, cols, values, n)) - onehot) / n
+            for c in range(5):
+                self.W[:, c] -= self.lr * (
+                    np.bincount(cols, weights=values * grad[rows, c], minlength=self.n_features)
+                    + self.l2 * self.W[:, c]
+                )
+            self.b -= self.lr * grad.sum(axis=0)
+        return self
+
+    @classmethod
+    def from_csv(cls, path: str, text_col: str = "user_review",
+                 rating_col: str = "user_rating", **kwargs) -> "LinearRatingModel":
+        df = pd.read_csv(path)
+        df = df[df[rating_col].isin([1, 2, 3, 4, 5])]
+        return cls(**kwargs).fit(df[text_col].fillna("").tolist(), df[rating_col].tolist())
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        rows, cols, values = _hash_features(texts, self.n_features)
+        return self._softmax(self._logits(rows, cols, values, len(texts)))
+
+    def predict(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        proba = self.predict_proba(texts)
+        return proba.argmax(axis=1) + 1, proba.max(axis=1)
+
+
+# ---------- CASCADE ---------- #
+
+class CascadePredictor:
+    """Local model first; the LLM only sees reviews below the threshold.
+
+    llm_predict(text) returns a star rating, or None when the call or
+    parsing failed, in which case the local prediction is kept. api_calls
+    counts llm_predict calls (reviews routed to the LLM), not retries.
+    """
+
+    def __init__(self, local_model, llm_predict: Callable[[str], Optional[int]],
+                 threshold: Optional[float] = None):
+        self.local_model = local_model
+        self.llm_predict = llm_predict
+        self.threshold = local_model.DEFAULT_THRESHOLD if threshold is None else threshold
+        self.api_calls = 0
+
+    def predict(self, texts: Sequence[str]) -> List[Dict]:
+        texts = list(texts)
+        stars, confidence = self.local_model.predict(texts)
+        out = []
+        for text, s, conf in zip(texts, stars, confidence):
+            if conf >= self.threshold:
+                out.append({"predicted_stars": int(s), "source": "local", "confidence": float(conf)})
+                continue
+            self.api_calls += 1
+            llm_stars = self.llm_predict(text)
+            if llm_stars is None:
+                out.append({"predicted_stars": int(s), "source": "local-fallback", "confidence": float(conf)})
+            else:
+                out.append({"predicted_stars": int(llm_stars), "source": "llm", "confidence": float(conf)})
+        return out
+
+
+def evaluate_cascade(
+    local_stars: Sequence[int],
+    local_confidence: Sequence[float],
+    llm_stars: Sequence[int],
+    actual: Sequence[int],
+    thresholds: Optional[Sequence[float]] = None,
+    llm_failed: Optional[Sequence[bool]] = None,
+) -> List[Dict]:
+    """Replay the cascade at several thresholds against LLM-only.
+
+    Uses predictions already collected for every review, so no API calls
+    are made and api_calls_saved is what the cascade *would* save; use it
+    to pick a threshold, then run CascadePredictor for real counts.
+    Pass the local model's THRESHOLDS; by default the confidence deciles
+    are used. llm_failed marks LLM outputs that were parser/model
+    fallbacks; the cascade replaces those with the local prediction.
+    """
+    local_stars = np.asarray(local_stars)
+    conf = np.asarray(local_confidence, dtype=float)
+    if thresholds is None:
+        thresholds = np.unique(np.quantile(conf, np.linspace(0.1, 0.9, 9))) if len(conf) else []
+    llm_stars = np.asarray(llm_stars)
+    actual = np.asarray(actual)
+    failed = np.zeros(len(actual), dtype=bool) if llm_failed is None else np.asarray(llm_failed, dtype=bool)
+    n = len(actual)
+
+    llm_acc = float(np.mean(llm_stars == actual)) if n else 0.0
+    rows = []
+    for t in thresholds:
+        local = conf >= t
+        pred = np.where(local | failed, local_stars, llm_stars)
+        rows.append({
+            "threshold": t,
+            "local_share": float(local.mean()) if n else 0.0,
+            "local_accuracy": float(np.mean(local_stars[local] == actual[local])) if local.any() else float("nan"),
+            "cascade_accuracy": float(np.mean(pred == actual)) if n else 0.0,
+            "llm_only_accuracy": llm_acc,
+            "api_calls": int((~local).sum()),
+            "api_calls_saved": int(local.sum()),
+        })
+    return rows
+
+
+def threshold_for_accuracy(
+    local_stars: Sequence[int],
+    local_confidence: Sequence[float],
+    actual: Sequence[int],
+    target: float,
+    thresholds: Sequence[float],
+    min_support: int = 20,
+) -> float:
+    """Lowest threshold whose confident predictions reach `target` accuracy.
+
+    Needs only local predictions and labels, so it can be fitted on a
+    held-out slice without any LLM calls. Thresholds keeping fewer than
+    min_support reviews are ignored; returns inf when none qualifies.
+    """
+    stars = np.asarray(local_stars)
+    conf = np.asarray(local_confidence, dtype=float)
+    actual = np.asarray(actual)
+    for t in sorted(thresholds):
+        local = conf >= t
+        if local.sum() >= min_support and np.mean(stars[local] == actual[local]) >= target:
+            return float(t)
+    return float("inf")
+
+
+def pick_threshold(rows: List[Dict], tolerance: float = 0.02) -> float:
+    """Threshold from evaluate_cascade() rows that saves the most calls
+    while staying within `tolerance` of LLM-only accuracy.
+
+    Returns inf (every review goes to the LLM) when none qualifies.
+    """
+    ok = [r for r in rows if r["cascade_accuracy"] >= r["llm_only_accuracy"] - tolerance]
+    if not ok:
+        return float("inf")
+    return max(ok, key=lambda r: (r["api_calls_saved"], -r["threshold"]))["threshold"]
@@ -0,0 +1,328 @@
+"""
+Background re-enrichment job for failed or stale AI fields.
+
+Finds reviews whose AI fields hold a failure sentinel ("AI temporarily
+unavailable." / "AI response failed.") or were generated from an older
+prompt template, regenerates only those fields through a rate-limited
+worker pool, and writes the repairs back to storage in batches.
+Summary/recommendation repairs go through the batched enrichment prompt
+(many reviews per request); ai_response is regenerated per review.
+Progress is checkpointed, so an interrupted run resumes where it stopped.
+
+    python src/reenrich_job.py --workers 4 --rate 1.0 --commit-every 20
+    python src/reenrich_job.py --business <business_id>
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+from llm_utils import (
+    ACCEPTED_VERSIONS,
+    ENRICHMENT_BATCH_FIELDS,
+    ENRICHMENT_BATCH_VERSION,
+    PROMPT_VERSIONS,
+    SENTINELS,
+    get_llm_manager,
+)
+from storage_utils import get_storage
+
+
+DEFAULT_CHECKPOINT = "reenrich_checkpoint.json"
+
+# Reviews per batched enrichment call (about one model request each)
+BATCH_CHUNK = 25
+
+# Every template whose output the job may write; an edit resets progress
+CHECKPOINT_VERSIONS = dict(PROMPT_VERSIONS, enrichment_batch=ENRICHMENT_BATCH_VERSION)
+
+
+# ---------- REPAIR INDEX ---------- #
+
+def review_key(review: Dict, position: int) -> str:
+    """Stable key for a stored review (id, or position for legacy rows)."""
+    if "id" in review:
+        return str(review["id"])
+    return f"pos-{position}"
+
+
+def stale_fields(review: Dict, include_untagged: bool = False) -> List[str]:
+    """AI fields of one review that need regenerating.
+
+    Rows saved before prompt versions were recorded have no tag; they are
+    only treated as stale with include_untagged, since most hold good output.
+    """
+    versions = review.get("prompt_versions") or {}
+    fields = []
+    for field, current in PROMPT_VERSIONS.items():
+        value = review.get(field)
+        if not value or value in SENTINELS:
+            fields.append(field)
+        elif field in versions:
+            if versions[field] not in ACCEPTED_VERSIONS[field]:
+                fields.append(field)
+        elif include_untagged:
+            fields.append(field)
+    return fields
+
+
+def build_repair_index(reviews: List[Dict], include_untagged: bool = False) -> Dict[str, List[str]]:
+    """Map review key -> fields to regenerate, for every review needing work."""
+    index = {}
+    for pos, review in enumerate(reviews):
+        fields = stale_fields(review, include_untagged)
+        if fields:
+            index[review_key(review, pos)] = fields
+    return index
+
+
+# ---------- RATE LIMITER ---------- #
+
+class RateLimiter:
+    """Spaces calls evenly so all workers together stay under `rate`/sec."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+# ---------- JOB ---------- #
+
+class ReEnrichmentJob:
+    """Regenerates stale AI fields and commits them in batches."""
+
+    def __init__(
+        self,
+        storage=None,
+        llm=None,
+        workers: int = 4,
+        rate: float = 1.0,
+        commit_every: int = 20,
+        checkpoint_path: str = DEFAULT_CHECKPOINT,
+        include_untagged: bool = False,
+        commit_retries: int = 3,
+        retry_delay: float = 2.0,
+        batch: bool = True,
+    ):
+        self.storage = storage or get_storage()
+        self.llm = llm or get_llm_manager()
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.commit_every = commit_every
+        self.checkpoint_path = checkpoint_path
+        self.include_untagged = include_untagged
+        self.commit_retries = commit_retries
+        self.retry_delay = retry_delay
+        self.batch = batch
+        self.done = self._load_checkpoint()
+        # generated: new LLM output; repaired: fields actually saved;
+        # uncommitted: generated but lost because the final save failed
+        self.stats = {"generated": 0, "repaired": 0, "failed": 0,
+                      "commits": 0, "uncommitted": 0}
+
+    # ----- checkpoint ----- #
+
+    def _load_checkpoint(self) -> set:
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        try:
+            with open(self.checkpoint_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        # A template edit since the last run invalidates earlier progress
+        if data.get("prompt_versions") != CHECKPOINT_VERSIONS:
+            return set()
+        return set(data.get("done", []))
+
+    def _save_checkpoint(self):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "prompt_versions": CHECKPOINT_VERSIONS,
+                "done": sorted(self.done),
+            }, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # ----- work ----- #
+
+    # Both regenerate paths return one [(field, value, version), ...] list
+    # per review they were given
+
+    def _regenerate(self, review: Dict, field: str) -> List[List[tuple]]:
+        self.limiter.acquire()
+        value = self.llm.generate_field(field, review["user_rating"], review["user_review"])
+        return [[(field, value, PROMPT_VERSIONS[field])]]
+
+    def _regenerate_batch(self, reviews: List[Dict]) -> List[List[tuple]]:
+        """Summary + recommendation for a chunk of reviews in one request.
+
+        One limiter slot per chunk; the batch path's own retries and
+        per-review fallbacks are not throttled separately.
+        """
+        self.limiter.acquire()
+        results = self.llm.process_reviews_batch([
+            {"rating": r["user_rating"], "review_text": r["user_review"]} for r in reviews
+        ], max_batch_size=BATCH_CHUNK)
+        return [
+            [(f, result[f], result["prompt_versions"][f]) for f in ENRICHMENT_BATCH_FIELDS]
+            for result in results
+        ]
+
+    def _submit(self, pool, tasks: List[tuple]) -> Dict:
+        """Submit tasks; maps future -> [(key, fields wanted)] per output row."""
+        futures = {}
+        by_review: Dict[str, tuple] = {}
+        for key, review, field in tasks:
+            if self.batch and field in ENRICHMENT_BATCH_FIELDS:
+                by_review.setdefault(key, (review, set()))[1].add(field)
+            else:
+                futures[pool.submit(self._regenerate, review, field)] = [(key, {field})]
+
+        chunk = list(by_review.items())
+        for start in range(0, len(chunk), BATCH_CHUNK):
+            part = chunk[start:start + BATCH_CHUNK]
+            future = pool.submit(self._regenerate_batch, [review for _, (review, _) in part])
+            futures[future] = [(key, fields) for key, (_, fields) in part]
+        return futures
+
+    def _commit(self, repairs: Dict[str, Dict[str, tuple]]) -> bool:
+        """Merge repairs into the latest stored data and save once.
+
+        Goes through update_reviews(), so the merge is applied to the data
+        actually being replaced (re-applied after a write conflict) and
+        reviews submitted while the job ran are never overwritten.
+        """
+        if not repairs:
+            return True
+
+        def merge(data):
+            for pos, review in enumerate(data):
+                fields = repairs.get(review_key(review, pos))
+                if not fields:
+                    continue
+                versions = dict(review.get("prompt_versions") or {})
+                for field, (value, version) in fields.items():
+                    review[field] = value
+                    versions[field] = version
+                review["prompt_versions"] = versions
+
+        if not self.storage.update_reviews(merge):
+            print("[ERROR] Re-enrichment commit failed, will retry")
+            return False
+
+        for key, fields in repairs.items():
+            for field in fields:
+                self.done.add(f"{key}:{field}")
+            self.stats["repaired"] += len(fields)
+        self._save_checkpoint()
+        self.stats["commits"] += 1
+        return True
+
+    def _final_commit(self, repairs: Dict[str, Dict[str, tuple]]):
+        """Last save of the run, retried with backoff before giving up."""
+        for attempt in range(self.commit_retries):
+            if self._commit(repairs):
+                return
+            time.sleep(self.retry_delay * 2 ** attempt)
+        lost = sum(len(fields) for fields in repairs.values())
+        self.stats["uncommitted"] += lost
+        print(f"[ERROR] {lost} regenerated field(s) could not be saved; "
+              "they will be picked up again on the next run")
+
+    def pending(self, reviews: List[Dict]) -> List[tuple]:
+        """(key, review, field) tuples still to process on this run."""
+        index = build_repair_index(reviews, self.include_untagged)
+        by_key = {review_key(r, pos): r for pos, r in enumerate(reviews)}
+        return [
+            (key, by_key[key], field)
+            for key, fields in index.items()
+            for field in fields
+            if f"{key}:{field}" not in self.done
+        ]
+
+    def run(self) -> Dict[str, int]:
+        tasks = self.pending(self.storage.load_reviews())
+        print(f"Re-enrichment: {len(tasks)} field(s) to regenerate")
+
+        # key -> field -> (value, prompt version)
+        repairs: Dict[str, Dict[str, tuple]] = {}
+        count = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = self._submit(pool, tasks)
+            for future in as_completed(futures):
+                for (key, wanted), outputs in zip(futures[future], future.result()):
+                    for field, value, version in outputs:
+                        if field not in wanted:
+                            continue
+                        if not value or value in SENTINELS:
+                            # Left untouched; the next run picks it up again
+                            self.stats["failed"] += 1
+                            continue
+                        repairs.setdefault(key, {})[field] = (value, version)
+                        self.stats["generated"] += 1
+                        count += 1
+
+                if count >= self.commit_every:
+                    if self._commit(repairs):
+                        repairs = {}
+                    count = 0
+
+        self._final_commit(repairs)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="max LLM calls per second")
+    parser.add_argument("--commit-every", type=int, default=20)
+    parser.add_argument("--business", default=None, help="business partition to repair")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument(
+        "--include-untagged", action="store_true",
+        help="also regenerate rows saved before prompt versions were recorded",
+    )
+    parser.add_argument(
+        "--no-batch", action="store_true",
+        help="regenerate summaries/recommendations one review at a time",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or (
+        f"reenrich_checkpoint.{args.business}.json" if args.business else DEFAULT_CHECKPOINT
+    )
+    job = ReEnrichmentJob(
+        storage=get_storage(args.business),
+        workers=args.workers,
+        rate=args.rate,
+        commit_every=args.commit_every,
+        checkpoint_path=checkpoint,
+        include_untagged=args.include_untagged,
+        batch=not args.no_batch,
+    )
+
+    if args.dry_run:
+        for key, _, field in job.pending(job.storage.load_reviews()):
+            print(f"{key}: {field}")
+        return
+
+    print(job.run())
+
+
+if __name__ == "__main__":
+    main()
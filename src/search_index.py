@@ -0,0 +1,131 @@
+"""
+Per-business keyword search index for the admin dashboard.
+
+An inverted index (token -> review positions) over `user_review` and
+`ai_summary`, so a search scans the posting lists of one business instead
+of every review string.
+
+Matching is by word, not substring: each query token matches words that
+start with it ("serv" finds "service", but "ice" does not), all tokens
+must match, and their order is ignored ("slow serv" finds "service was
+slow"). Queries without any letters or digits are left to the caller.
+
+Like AspectIndex, `update()` keeps a fingerprint per row and re-tokenizes
+only new or changed rows, so scattered in-place rewrites (re-enrichment
+of `ai_summary`) show up on the next rerun at the cost of those rows.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from text_utils import tokenize
+
+
+SEARCH_FIELDS = ("user_review", "ai_summary")
+
+
+class ReviewSearchIndex:
+    """Inverted index over the reviews of one business.
+
+    Shared across Streamlit sessions, so updates and searches hold a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self._fingerprints: List[int] = []
+        # Tokens of each row, to take a rewritten row out of its postings
+        self._row_tokens: List[Tuple[str, ...]] = []
+        self._sorted_terms: List[str] = []
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    @staticmethod
+    def _fingerprint(review: Dict) -> int:
+        return hash(tuple(review.get(field) or "" for field in SEARCH_FIELDS))
+
+    @staticmethod
+    def _tokens(review: Dict) -> Tuple[str, ...]:
+        tokens = set()
+        for field in SEARCH_FIELDS:
+            tokens.update(tokenize(review.get(field) or ""))
+        return tuple(tokens)
+
+    def update(self, reviews: List[Dict]) -> int:
+        """Bring the index in line with `reviews`; returns rows (re)indexed.
+
+        Changed rows are removed from and re-added to their posting lists
+        (kept sorted by position); new rows are appended. A shorter list
+        means rows were removed (positions shift), so the index is rebuilt.
+        """
+        fingerprints = [self._fingerprint(r) for r in reviews]
+        with self._lock:
+            if len(reviews) < len(self):
+                self._reset()
+            changed = [
+                pos for pos, (old, new) in enumerate(zip(self._fingerprints, fingerprints))
+                if old != new
+            ]
+            start = len(self)
+            if not changed and start == len(reviews):
+                return 0
+
+            n_terms = len(self.postings)
+            vocab_shrank = False
+            for pos in changed:
+                for token in self._row_tokens[pos]:
+                    positions = self.postings[token]
+                    del positions[bisect_left(positions, pos)]
+                    if not positions:
+                        del self.postings[token]
+                        vocab_shrank = True
+                tokens = self._tokens(reviews[pos])
+                for token in tokens:
+                    insort(self.postings[token], pos)
+                self._row_tokens[pos] = tokens
+                self._fingerprints[pos] = fingerprints[pos]
+
+            for pos in range(start, len(reviews)):
+                tokens = self._tokens(reviews[pos])
+                for token in tokens:
+                    self.postings[token].append(pos)
+                self._row_tokens.append(tokens)
+            self._fingerprints.extend(fingerprints[start:])
+
+            if vocab_shrank or len(self.postings) != n_terms:
+                self._sorted_terms = sorted(self.postings)
+            return len(changed) + len(reviews) - start
+
+    def _prefix_matches(self, prefix: str) -> Set[int]:
+        matches = set()
+        i = bisect_left(self._sorted_terms, prefix)
+        while i < len(self._sorted_terms) and self._sorted_terms[i].startswith(prefix):
+            matches.update(self.postings[self._sorted_terms[i]])
+            i += 1
+        return matches
+
+    def search(self, query: str) -> Optional[List[int]]:
+        """Sorted positions of reviews matching every query token.
+
+        None when the query has no tokens (e.g. "!" or "--"); the index
+        cannot answer those and the caller should fall back to substring
+        matching.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+
+        with self._lock:
+            # Most selective (shortest posting set) first
+            result = None
+            for matches in sorted((self._prefix_matches(t) for t in set(tokens)), key=len):
+                result = matches if result is None else result & matches
+                if not result:
+                    return []
+            return sorted(result)
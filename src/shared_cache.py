@@ -0,0 +1,200 @@
+"""
+Cross-process cache shared by all dashboard worker processes.
+
+Backed by a local SQLite file in WAL mode, so N `streamlit run` processes
+on one host see the same review snapshot, analytics and LLM responses.
+
+Invalidation is one counter per scope (the storage generation; a scope
+is a business partition, "" for the legacy single file): every successful
+storage write bumps its scope's counter, and entries stored with
+`versioned=True` are ignored once their scope's generation moves past
+them. LLM responses are content-addressed and stored unversioned; since
+invalidate() never removes those, such namespaces are bounded by age and
+row count instead (NAMESPACE_LIMITS).
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+
+DEFAULT_CACHE_PATH = str(Path(__file__).parent.parent / ".fynd_cache.sqlite3")
+
+# Bump when the tables change; older cache files are simply rebuilt
+SCHEMA_VERSION = 3
+
+# Unversioned namespaces: (max age in seconds, max rows). Older rows are
+# ignored by get() and deleted by prune(), which set() runs every
+# PRUNE_EVERY writes to the namespace.
+NAMESPACE_LIMITS = {
+    "llm": (7 * 24 * 3600, 20000),
+}
+PRUNE_EVERY = 100
+
+SCHEMA = """
+DROP TABLE IF EXISTS meta;
+DROP TABLE IF EXISTS entries;
+CREATE TABLE meta (
+    scope TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+CREATE TABLE entries (
+    namespace  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    scope      TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    created    REAL NOT NULL,
+    value      BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX entries_scope ON entries (scope, generation);
+CREATE INDEX entries_age ON entries (namespace, created);
+PRAGMA user_version = {version};
+"""
+
+
+class SharedCache:
+    """Small pickle-valued key/value cache in a shared SQLite file."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        # sqlite3 connections must not cross threads; Streamlit sessions do
+        self._local = threading.local()
+        self._writes = {}
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-checked under the write lock so only one worker rebuilds
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for statement in SCHEMA.format(version=SCHEMA_VERSION).split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- INVALIDATION SIGNAL ---------- #
+
+    def generation(self, scope: str = "") -> int:
+        row = self._conn().execute(
+            "SELECT generation FROM meta WHERE scope = ?", (scope,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def invalidate(self, scope: str = "") -> int:
+        """Bump one scope's storage generation; returns the new value."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO meta (scope, generation) VALUES (?, 1) "
+            "ON CONFLICT (scope) DO UPDATE SET generation = generation + 1",
+            (scope,),
+        )
+        generation = self.generation(scope)
+        # Drop entries no reader can use any more; other scopes are untouched
+        conn.execute(
+            "DELETE FROM entries WHERE scope = ? AND generation >= 0 AND generation < ?",
+            (scope, generation),
+        )
+        return generation
+
+    # ---------- ENTRIES ---------- #
+
+    def get(self, namespace: str, key: str, ttl: Optional[float] = None,
+            versioned: bool = True) -> Optional[Any]:
+        """Cached value, or None if missing, expired or from an old generation."""
+        row = self._conn().execute(
+            "SELECT e.value, e.created, e.generation, "
+            "COALESCE((SELECT m.generation FROM meta m WHERE m.scope = e.scope), 0) "
+            "FROM entries e WHERE e.namespace = ? AND e.key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        value, created, generation, current = row
+        if versioned and generation != current:
+            return None
+        if ttl is None and namespace in NAMESPACE_LIMITS:
+            ttl = NAMESPACE_LIMITS[namespace][0]
+        if ttl is not None and time.time() - created > ttl:
+            return None
+        return pickle.loads(value)
+
+    def set(self, namespace: str, key: str, value: Any, versioned: bool = True,
+            generation: Optional[int] = None, scope: str = ""):
+        """Store a value.
+
+        For versioned entries pass the generation read *before* computing
+        the value, so a result computed across a storage write is never
+        stored over a newer one.
+        """
+        if versioned:
+            generation = self.generation(scope) if generation is None else generation
+        else:
+            generation = -1
+        self._conn().execute(
+            "INSERT INTO entries (namespace, key, scope, generation, created, value) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            "scope = excluded.scope, generation = excluded.generation, "
+            "created = excluded.created, value = excluded.value "
+            "WHERE excluded.generation >= entries.generation",
+            (namespace, key, scope, generation, time.time(),
+             pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+        if namespace in NAMESPACE_LIMITS:
+            self._writes[namespace] = self._writes.get(namespace, 0) + 1
+            if self._writes[namespace] % PRUNE_EVERY == 0:
+                self.prune(namespace)
+
+    def prune(self, namespace: str):
+        """Delete rows of a bounded namespace past its age or row limit."""
+        max_age, max_rows = NAMESPACE_LIMITS[namespace]
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND created < ?",
+            (namespace, time.time() - max_age),
+        )
+        # Keep the newest max_rows
+        conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND created < ("
+            "SELECT created FROM entries WHERE namespace = ? "
+            "ORDER BY created DESC LIMIT 1 OFFSET ?)",
+            (namespace, namespace, max_rows - 1),
+        )
+
+    def delete(self, namespace: str, key: str):
+        self._conn().execute(
+            "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries")
+
+
+# Global instance (one per process, shared file across processes)
+_shared_cache = None
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Process-wide cache, or None when disabled with FYND_CACHE_PATH=off."""
+    global _shared_cache
+    path = os.getenv("FYND_CACHE_PATH", DEFAULT_CACHE_PATH)
+    if path == "off":
+        return None
+    if _shared_cache is None or _shared_cache.path != path:
+        _shared_cache = SharedCache(path)
+    return _shared_cache
@@ -1,9 +1,16 @@
+import os
+import re
 import json
+import time
+import sqlite3
 import requests
 import streamlit as st
 from datetime import datetime
 import pandas as pd
 import base64
+from contextlib import contextmanager
+
+from shared_cache import get_shared_cache
 
 # ----------------------------
 # GitHub Storage Configuration
@@ -11,27 +18,119 @@ import base64
 GITHUB_REPO = "Nexus2005/Fynd"
 FILE_PATH = "reviews.json"
 
-RAW_URL = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main/{FILE_PATH}"
-API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{FILE_PATH}"
+# Each business gets its own partition: businesses/<business_id>/reviews.json
+BUSINESS_DIR = "businesses"
+BUSINESS_ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+RAW_BASE = f"https://raw.githubusercontent.com/{GITHUB_REPO}/main"
+API_BASE = f"https://api.github.com/repos/{GITHUB_REPO}/contents"
+# The contents API lists at most 1000 entries per directory; a tree
+# listing is not capped that low
+TREES_BASE = f"https://api.github.com/repos/{GITHUB_REPO}/git/trees"
+
+# Set to read/write the same layout from a local directory instead of GitHub
+LOCAL_STORAGE_DIR = os.getenv("FYND_STORAGE_DIR")
+
+
+
+def _github_token():
+    """GITHUB_TOKEN from Streamlit secrets, else the environment.
+
+    st.secrets raises when no secrets.toml exists (CLI jobs, tests).
+    """
+    try:
+        token = st.secrets.get("GITHUB_TOKEN")
+    except Exception:
+        token = None
+    return token or os.getenv("GITHUB_TOKEN")
+
 
-GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN")  # MUST be added in Streamlit secrets
+GITHUB_TOKEN = _github_token()  # MUST be added in Streamlit secrets (or env)
 
 HEADERS = {
     "Authorization": f"Bearer {GITHUB_TOKEN}",
     "Accept": "application/vnd.github+json"
 }
 
+# Seconds before a GitHub request is abandoned; a hung call would
+# otherwise hold a dashboard rerun (and the write lock) forever
+REQUEST_TIMEOUT = 30
+
+# Read-modify-write attempts before giving up on repeated sha conflicts
+WRITE_RETRIES = 5
+
+# raw.githubusercontent.com is CDN-cached for up to 5 minutes, so a shorter
+# TTL could refetch data older than our own write-through snapshot
+SNAPSHOT_TTL = float(os.getenv("FYND_SNAPSHOT_TTL", "300"))
+
+# After a failed business listing, seconds to keep serving the last good
+# one before asking GitHub again
+LISTING_RETRY_AFTER = 30.0
+
+
+def business_file_path(business_id=None):
+    """Storage path of a business partition (None = legacy global file)."""
+    if business_id is None:
+        return FILE_PATH
+    if not BUSINESS_ID_RE.match(business_id):
+        raise ValueError(f"Invalid business_id: {business_id!r}")
+    return f"{BUSINESS_DIR}/{business_id}/{FILE_PATH}"
+
+
+@contextmanager
+def _local_write_lock(path):
+    """Cross-process lock for one local partition.
+
+    BEGIN IMMEDIATE on a small SQLite file next to it: portable (no fcntl)
+    and released by the OS if the holder dies.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path + ".lock", timeout=60, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        conn.close()
+
 
 class CloudStorage:
 
+    def __init__(self, business_id=None):
+        self.business_id = business_id
+        self.file_path = business_file_path(business_id)
+        # Shared-cache scope: writes here never invalidate other businesses
+        self.scope = business_id or ""
+
     # ----------------------------
-    # Load reviews from GitHub raw
+    # Load reviews (GitHub raw or local dir)
     # ----------------------------
+    def _fetch_reviews(self):
+        if LOCAL_STORAGE_DIR:
+            with open(os.path.join(LOCAL_STORAGE_DIR, self.file_path)) as f:
+                return json.load(f)
+
+        r = requests.get(f"{RAW_BASE}/{self.file_path}", timeout=REQUEST_TIMEOUT)
+        if r.status_code == 200:
+            return r.json()
+        return None
+
     def load_reviews(self):
+        cache = get_shared_cache()
+        if cache:
+            cached = cache.get("snapshot", self.file_path, ttl=SNAPSHOT_TTL)
+            if cached is not None:
+                return cached
+            generation = cache.generation(self.scope)
+
         try:
-            r = requests.get(RAW_URL)
-            if r.status_code == 200:
-                return r.json()
+            data = self._fetch_reviews()
+            if data is not None:
+                if cache:
+                    cache.set("snapshot", self.file_path, data,
+                              generation=generation, scope=self.scope)
+                return data
         except:
             pass
         return []
@@ -39,37 +138,138 @@ class CloudStorage:
     # ----------------------------
     # Save reviews back to GitHub
     # ----------------------------
-    def save_reviews(self, data):
+    def _local_path(self):
+        return os.path.join(LOCAL_STORAGE_DIR, self.file_path)
+
+    def _write_local(self, data):
+        path = self._local_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+        return True
+
+    def _fetch_latest(self):
+        """(reviews, sha) straight from the contents API, bypassing the CDN.
+
+        sha is None for a partition that does not exist yet; reviews is
+        None if the read failed.
+        """
+        api_url = f"{API_BASE}/{self.file_path}"
+        r = requests.get(api_url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        if r.status_code == 404:
+            return [], None
+        if r.status_code != 200:
+            return None, None
+        info = r.json()
+        content = info.get("content")
+        if not content:
+            # Files over 1 MB come without content; fetch the blob instead
+            blob = requests.get(
+                f"https://api.github.com/repos/{GITHUB_REPO}/git/blobs/{info['sha']}",
+                headers=HEADERS, timeout=REQUEST_TIMEOUT,
+            )
+            if blob.status_code != 200:
+                return None, None
+            content = blob.json()["content"]
+        return json.loads(base64.b64decode(content)), info["sha"]
+
+    def _put(self, data, sha):
+        """Conditional write: GitHub rejects it (409) if the file moved past sha."""
+        encoded = base64.b64encode(
+            json.dumps(data, indent=2).encode()
+        ).decode()
+        payload = {
+            "message": f"Update {self.file_path}",
+            "content": encoded,
+        }
+        if sha:
+            payload["sha"] = sha
+        resp = requests.put(f"{API_BASE}/{self.file_path}", headers=HEADERS,
+                            json=payload, timeout=REQUEST_TIMEOUT)
+        return resp.status_code
+
+    def _after_save(self, data):
+        # One invalidation signal for every worker process
+        cache = get_shared_cache()
+        if cache:
+            cache.invalidate(self.scope)
+            cache.set("snapshot", self.file_path, data, scope=self.scope)
+            if self.business_id:
+                # The first save (create_business) creates the partition
+                _mark_listing_stale(cache)
+
+    def update_reviews(self, mutate):
+        """Apply mutate(data) to the latest stored reviews and save.
+
+        The only safe way to change existing data with several writers
+        (dashboard workers, the re-enrichment job): local partitions are
+        locked across processes; on GitHub the write is conditional on the
+        sha that was read, and a conflict reloads and calls mutate again on
+        fresh data. mutate edits the list in place. Returns True if saved.
+        """
         try:
-            # Encode to base64
-            encoded = base64.b64encode(
-                json.dumps(data, indent=2).encode()
-            ).decode()
-
-            # Get SHA
-            sha_info = requests.get(API_URL, headers=HEADERS).json()
-            sha = sha_info.get("sha")
-
-            payload = {
-                "message": "Update reviews.json",
-                "content": encoded,
-                "sha": sha
-            }
+            if LOCAL_STORAGE_DIR:
+                with _local_write_lock(self._local_path()):
+                    try:
+                        data = self._fetch_reviews()
+                    except FileNotFoundError:
+                        data = []
+                    mutate(data)
+                    self._write_local(data)
+                self._after_save(data)
+                return True
 
-            resp = requests.put(API_URL, headers=HEADERS, json=payload)
-            return resp.status_code in (200, 201)
+            for attempt in range(WRITE_RETRIES):
+                data, sha = self._fetch_latest()
+                if data is None:
+                    return False
+                mutate(data)
+                status = self._put(data, sha)
+                if status in (200, 201):
+                    self._after_save(data)
+                    return True
+                # 409: sha is stale; 422: file created since we looked
+                if status not in (409, 422):
+                    return False
+                time.sleep(0.5 * 2 ** attempt)
+            print("SAVE ERROR: gave up after repeated write conflicts")
+            return False
 
         except Exception as e:
             print("SAVE ERROR:", e)
             return False
 
+    def save_reviews(self, data):
+        """Overwrite the partition with data (last writer wins).
+
+        Use update_reviews() to change data that others may write too.
+        """
+        def replace(current):
+            current[:] = data
+
+        return self.update_reviews(replace)
+
     # ----------------------------
     # Add one review
     # ----------------------------
     def add_review(self, entry):
-        data = self.load_reviews()
-        data.append(entry)
-        return self.save_reviews(data)
+        # The id is picked from the data actually written, so a retry
+        # after a conflict picks it again
+        assigned = {}
+
+        def append(data):
+            review = dict(entry)
+            if "id" not in review:
+                review["id"] = max((r.get("id", 0) for r in data), default=0) + 1
+            assigned["id"] = review["id"]
+            data.append(review)
+
+        ok = self.update_reviews(append)
+        if ok:
+            entry["id"] = assigned["id"]
+        return ok
 
     # ----------------------------
     # Get all
@@ -81,7 +281,20 @@ class CloudStorage:
     # Dashboard analytics
     # ----------------------------
     def get_analytics(self):
-        reviews = self.load_reviews()
+        cache = get_shared_cache()
+        if cache:
+            cached = cache.get("analytics", self.file_path, ttl=SNAPSHOT_TTL)
+            if cached is not None:
+                return cached
+            generation = cache.generation(self.scope)
+
+        analytics = self._compute_analytics(self.load_reviews())
+        if cache and analytics["total_reviews"]:
+            cache.set("analytics", self.file_path, analytics,
+                      generation=generation, scope=self.scope)
+        return analytics
+
+    def _compute_analytics(self, reviews):
         if not reviews:
             return {
                 "total_reviews": 0,
@@ -118,6 +331,92 @@ class CloudStorage:
             return False
 
 
+# ----------------------------
+# Business registry
+# ----------------------------
+def _scan_businesses():
+    """Business ids with a partition, or None if the listing failed."""
+    if LOCAL_STORAGE_DIR:
+        root = os.path.join(LOCAL_STORAGE_DIR, BUSINESS_DIR)
+        if not os.path.isdir(root):
+            return []
+        return sorted(
+            name for name in os.listdir(root)
+            if BUSINESS_ID_RE.match(name)
+            and os.path.exists(os.path.join(root, name, FILE_PATH))
+        )
+
+    try:
+        r = requests.get(f"{TREES_BASE}/main:{BUSINESS_DIR}", headers=HEADERS,
+                         timeout=REQUEST_TIMEOUT)
+        if r.status_code == 404:
+            # No partition has been created yet
+            return []
+        if r.status_code != 200:
+            return None
+        return sorted(
+            item["path"] for item in r.json().get("tree", [])
+            if item.get("type") == "tree" and BUSINESS_ID_RE.match(item["path"])
+        )
+    except:
+        return None
+
+
+# Listing kept in-process when there is no shared cache
+_listing = {"ids": [], "expires": 0.0}
+
+
+def _mark_listing_stale(cache):
+    """Force a rescan on the next list_businesses() but keep the ids."""
+    cached = cache.get("businesses", BUSINESS_DIR, versioned=False)
+    if isinstance(cached, dict):
+        cache.set("businesses", BUSINESS_DIR, dict(cached, expires=0.0), versioned=False)
+
+
+def list_businesses():
+    """Business ids that have a partition, sorted.
+
+    Called on every dashboard rerun, so the listing is cached for
+    SNAPSHOT_TTL; saving to a business marks it stale. If a rescan fails
+    the last good listing is served and the scan is retried after
+    LISTING_RETRY_AFTER, so an outage neither empties the selector nor
+    sends a GitHub call on every rerun.
+    """
+    cache = get_shared_cache()
+    listing = _listing
+    if cache:
+        cached = cache.get("businesses", BUSINESS_DIR, versioned=False)
+        if isinstance(cached, dict):
+            listing = cached
+
+    now = time.time()
+    if now < listing["expires"]:
+        return listing["ids"]
+
+    ids = _scan_businesses()
+    if ids is None:
+        listing = {"ids": listing["ids"], "expires": now + LISTING_RETRY_AFTER}
+    else:
+        listing = {"ids": ids, "expires": now + SNAPSHOT_TTL}
+
+    if cache:
+        cache.set("businesses", BUSINESS_DIR, listing, versioned=False)
+    else:
+        _listing.update(listing)
+    return listing["ids"]
+
+
+def create_business(business_id):
+    """Register a business by creating its empty partition.
+
+    Raises ValueError for a malformed id; returns False if the write failed.
+    """
+    business_file_path(business_id)
+    if business_id in (_scan_businesses() or []):
+        return True
+    return CloudStorage(business_id).save_reviews([])
+
+
 # Global instance
-def get_storage():
-    return CloudStorage()
+def get_storage(business_id=None):
+    return CloudStorage(business_id)
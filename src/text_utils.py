@@ -0,0 +1,43 @@
+"""
+Text helpers shared by the analytics modules.
+Pure Python so they can be used without NumPy/SciPy.
+"""
+
+import re
+from typing import List
+
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i i'm i've if in into is it it's its itself just let's me more
+most my myself no nor not of off on once only or other our ours ourselves out
+over own same she should so some such than that that's the their theirs them
+themselves then there these they this those through to too under until up us
+very was we we're were what when where which while who whom why will with would
+you you're your yours yourself yourselves
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, stopwords kept (negations matter to callers)."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+def terms(text: str, bigrams: bool = True) -> List[str]:
+    """Content terms: non-stopword unigrams plus adjacent non-stopword bigrams."""
+    tokens = tokenize(text)
+    keep = [t not in STOPWORDS and len(t) > 1 for t in tokens]
+    out = [t for t, k in zip(tokens, keep) if k]
+    if bigrams:
+        out.extend(
+            f"{tokens[i]} {tokens[i + 1]}"
+            for i in range(len(tokens) - 1)
+            if keep[i] and keep[i + 1]
+        )
+    return out
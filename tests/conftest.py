@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# src modules import each other by bare name, as the dashboards do
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
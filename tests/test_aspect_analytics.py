@@ -0,0 +1,118 @@
+"""AspectIndex counts and incremental updates."""
+
+import threading
+
+import pytest
+
+pytest.importorskip("scipy")
+
+from aspect_analytics import AspectIndex
+
+
+def review(text, rating=5, action="", timestamp="2024-01-01T10:00:00"):
+    return {"user_review": text, "user_rating": rating,
+            "ai_recommended_action": action, "timestamp": timestamp}
+
+
+def term_counts(index):
+    # Ties are ordered by vocabulary column, which depends on history
+    return {stars: set(top) for stars, top in index.top_terms_by_rating(50).items()}
+
+
+def fresh_counts(reviews):
+    index = AspectIndex()
+    index.update(reviews)
+    return term_counts(index), index.aspect_by_rating()["counts"].tolist()
+
+
+def assert_matches_fresh(index, reviews):
+    top, aspects = fresh_counts(reviews)
+    assert term_counts(index) == top
+    assert index.aspect_by_rating()["counts"].tolist() == aspects
+
+
+def test_counts_by_rating():
+    index = AspectIndex()
+    index.update([review("rude staff", 1), review("friendly staff, great food", 5)])
+    top = dict(index.top_terms_by_rating(10))
+    assert ("rude", 1) in top[1] and ("staff", 1) in top[1]
+    assert ("friendly", 1) in top[5]
+    by_rating = index.aspect_by_rating()
+    service = by_rating["aspects"].index("service")
+    assert by_rating["counts"][0][service] == 1
+    assert by_rating["share"][4][service] == 1.0
+
+
+def test_append_only_indexes_tail():
+    reviews = [review("slow service", 2)]
+    index = AspectIndex()
+    assert index.update(reviews) == 1
+    assert index.update(reviews) == 0
+    reviews.append(review("tiny portion", 3))
+    assert index.update(reviews) == 1
+    assert_matches_fresh(index, reviews)
+
+
+def test_in_place_rewrite_is_picked_up():
+    reviews = [review("ok", 3, action="x"), review("cold food", 1, action="y")]
+    index = AspectIndex()
+    index.update(reviews)
+    reviews[0]["ai_recommended_action"] = "Improve wait time"
+    # Only the edited row is re-tokenized
+    assert index.update(reviews) == 1
+    assert_matches_fresh(index, reviews)
+
+
+def test_scattered_rewrites_and_appends_together():
+    reviews = [review(f"row {i} food", (i % 5) + 1, action="x") for i in range(50)]
+    index = AspectIndex()
+    index.update(reviews)
+    for i in (0, 7, 31):
+        reviews[i]["ai_recommended_action"] = f"Improve service {i}"
+    reviews[12]["user_rating"] = 1
+    reviews.append(review("slow wait", 2))
+    assert index.update(reviews) == 5
+    assert_matches_fresh(index, reviews)
+
+
+def test_float_and_bad_ratings_are_coerced():
+    index = AspectIndex()
+    index.update([review("great", 5.0), review("bad", "oops"), review("ok", None)])
+    by_rating = index.aspect_by_rating()
+    assert index.top_terms_by_rating(5)[5] == [("great", 1)]
+    assert by_rating["counts"].shape == (5, len(by_rating["aspects"]))
+
+
+def test_replaced_list_of_same_length_is_picked_up():
+    index = AspectIndex()
+    index.update([review("dirty tables", 1), review("loud music", 2)])
+    replaced = [review("clean and cozy", 5), review("great value", 4), review("fast", 5)]
+    index.update(replaced)
+    assert len(index) == 3
+    assert_matches_fresh(index, replaced)
+
+
+def test_concurrent_updates_do_not_double_count():
+    reviews = [review(f"friendly staff {i}", 5) for i in range(300)]
+    index = AspectIndex()
+    threads = [threading.Thread(target=index.update, args=(reviews,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(index) == 300
+    assert_matches_fresh(index, reviews)
+
+
+def test_aspect_over_time_buckets_by_month():
+    index = AspectIndex()
+    index.update([
+        review("slow wait", 2, timestamp="2024-01-05T00:00:00"),
+        review("long wait", 2, timestamp="2024-01-20T00:00:00"),
+        review("wait", 3, timestamp="2024-02-02T00:00:00"),
+        review("no date", 3, timestamp=None),
+    ])
+    out = index.aspect_over_time("M")
+    wait = out["aspects"].index("wait time")
+    assert [str(p) for p in out["periods"]] == ["2024-01-01", "2024-02-01"]
+    assert out["counts"][:, wait].tolist() == [2, 1]
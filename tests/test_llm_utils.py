@@ -0,0 +1,166 @@
+"""Batch packing, parsing and retry logic of LLMManager (no network)."""
+
+import json
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+from llm_utils import (
+    AI_FAILED,
+    ENRICHMENT_BATCH_FIELDS,
+    ENRICHMENT_BATCH_INSTRUCTIONS,
+    ENRICHMENT_BATCH_VERSION,
+    PROMPT_VERSIONS,
+    LLMManager,
+    parse_json_array,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    monkeypatch.setenv("FYND_CACHE_PATH", "off")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if isinstance(self._text, Exception):
+            raise self._text
+        return self._text
+
+
+class FakeModel:
+    """Replies to batch prompts; `replies` overrides the first calls."""
+
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        if self.replies:
+            return FakeResponse(self.replies.pop(0))
+        ids = [
+            json.loads(line)["id"]
+            for line in prompt.split("Reviews:\n")[1].split("\n\n")[0].splitlines()
+        ]
+        return FakeResponse(json.dumps([
+            {"id": i, "ai_summary": f"summary {i}", "ai_recommended_action": "act"}
+            for i in ids
+        ]))
+
+
+def items(n, length=20):
+    return [{"rating": 4, "review_text": "x" * length} for _ in range(n)]
+
+
+def test_parse_json_array_handles_fences_and_garbage():
+    assert parse_json_array('```json\n[{"a": 1}]\n```') == [{"a": 1}]
+    assert parse_json_array("no json here") is None
+    assert parse_json_array('[{"a": 1},') is None
+    assert parse_json_array('{"a": [1, 2]}') == [1, 2]
+
+
+def test_pack_batches_respects_budget_and_size():
+    llm = LLMManager(model=FakeModel())
+    batches = llm._pack_batches(items(10, length=400), ENRICHMENT_BATCH_FIELDS,
+                                token_budget=500, max_batch_size=25,
+                                output_tokens_per_field=60)
+    # 101 text + 120 output tokens per item -> 2 items per batch
+    assert [len(b) for b in batches] == [2] * 5
+    assert sum(batches, []) == list(range(10))
+
+    batches = llm._pack_batches(items(10), ENRICHMENT_BATCH_FIELDS,
+                                token_budget=10 ** 6, max_batch_size=4,
+                                output_tokens_per_field=60)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+
+def test_pack_batches_oversized_item_gets_own_batch():
+    llm = LLMManager(model=FakeModel())
+    batches = llm._pack_batches(items(3, length=4000), ENRICHMENT_BATCH_FIELDS,
+                                token_budget=100, max_batch_size=25,
+                                output_tokens_per_field=60)
+    assert batches == [[0], [1], [2]]
+
+
+def test_generate_batch_reissues_only_failed_items():
+    bad = json.dumps([
+        {"id": 0, "ai_summary": "ok", "ai_recommended_action": "act"},
+        {"id": 1, "ai_summary": ""},
+        {"id": 2, "ai_summary": "ok", "ai_recommended_action": "act"},
+    ])
+    model = FakeModel(replies=[bad])
+    llm = LLMManager(model=model)
+
+    out = llm.generate_batch(items(3), ENRICHMENT_BATCH_INSTRUCTIONS, ENRICHMENT_BATCH_FIELDS)
+
+    assert all(o is not None for o in out)
+    assert len(model.prompts) == 2
+    # Retry prompt carries only the one failed review
+    assert "exactly 1 objects" in model.prompts[1]
+
+
+def test_generate_batch_gives_up_after_retries():
+    model = FakeModel(replies=["truncated [{"] * 10)
+    llm = LLMManager(model=model)
+
+    out = llm.generate_batch(items(2), ENRICHMENT_BATCH_INSTRUCTIONS,
+                             ENRICHMENT_BATCH_FIELDS, max_retries=2)
+
+    assert out == [None, None]
+    assert len(model.prompts) == 3
+
+
+def test_unreadable_text_is_counted_once():
+    llm = LLMManager(model=FakeModel(replies=[ValueError("blocked")]))
+
+    assert llm.generate("hello") == AI_FAILED
+    assert llm.usage["requests"] == 1
+    assert llm.usage["failed_requests"] == 1
+
+
+def test_batch_retries_bypass_cached_bad_reply(tmp_path, monkeypatch):
+    monkeypatch.setenv("FYND_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    model = FakeModel(replies=["truncated [{"])
+    llm = LLMManager(model=model)
+
+    out = llm.generate_batch(items(2), ENRICHMENT_BATCH_INSTRUCTIONS, ENRICHMENT_BATCH_FIELDS)
+
+    assert all(o is not None for o in out)
+    assert llm.usage["requests"] == 2 and llm.usage["cache_hits"] == 0
+
+    # The valid reply was cached, so a rerun needs no request
+    llm.reset_usage()
+    assert llm.generate_batch(items(2), ENRICHMENT_BATCH_INSTRUCTIONS, ENRICHMENT_BATCH_FIELDS) == out
+    assert llm.usage["requests"] == 0 and llm.usage["cache_hits"] == 1
+
+
+def test_use_cache_false_always_reaches_model(tmp_path, monkeypatch):
+    monkeypatch.setenv("FYND_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    model = FakeModel(replies=["hi", "hi"])
+    LLMManager(model=FakeModel(replies=["hi"])).generate("hello")
+
+    llm = LLMManager(model=model, use_cache=False)
+    assert llm.generate("hello") == "hi"
+    assert llm.usage["requests"] == 1 and llm.usage["cache_hits"] == 0
+
+
+def test_process_reviews_batch_tags_versions():
+    # Batch replies never validate, so the second review falls back
+    model = FakeModel(replies=[json.dumps([
+        {"id": 0, "ai_summary": "s", "ai_recommended_action": "a"},
+    ])] + ["broken"] * 2 + ["fallback summary", "fallback action"])
+    llm = LLMManager(model=model)
+
+    first, second = llm.process_reviews_batch(items(2))
+
+    assert first["prompt_versions"] == {
+        "ai_summary": ENRICHMENT_BATCH_VERSION, "ai_recommended_action": ENRICHMENT_BATCH_VERSION,
+    }
+    assert second["ai_summary"] == "fallback summary"
+    assert second["prompt_versions"]["ai_summary"] == PROMPT_VERSIONS["ai_summary"]
@@ -0,0 +1,95 @@
+"""Local rating models, the cascade and threshold selection."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+from rating_predictor import (
+    CascadePredictor,
+    LexiconRatingModel,
+    LinearRatingModel,
+    evaluate_cascade,
+    pick_threshold,
+    threshold_for_accuracy,
+)
+
+
+def test_lexicon_polarity_and_negation():
+    stars, conf = LexiconRatingModel().predict([
+        "absolutely amazing food, loved it",
+        "terrible service and rude staff",
+        "not good",
+        "never disappointed",
+    ])
+    assert stars[0] == 5 and stars[1] == 1
+    assert stars[2] < 3 and stars[3] > 3
+    assert conf[0] > conf[2]
+
+
+def test_never_is_only_a_negator():
+    # Not a lexicon word of its own, so it never scores by itself
+    assert LexiconRatingModel().score("never again") == (0.0, 0.0)
+
+
+def test_linear_model_learns_separable_reviews():
+    texts = ["great food loved it"] * 20 + ["awful rude slow"] * 20
+    stars = [5] * 20 + [1] * 20
+    model = LinearRatingModel(n_features=2 ** 10, epochs=100).fit(texts, stars)
+    pred, conf = model.predict(["loved the great food", "rude and awful"])
+    assert pred.tolist() == [5, 1]
+    assert (conf > 0.5).all()
+
+
+class FixedModel:
+    DEFAULT_THRESHOLD = 0.5
+
+    def __init__(self, stars, confidence):
+        self.stars, self.confidence = np.array(stars), np.array(confidence)
+
+    def predict(self, texts):
+        return self.stars[:len(texts)], self.confidence[:len(texts)]
+
+
+def test_cascade_calls_llm_only_below_threshold():
+    calls = []
+
+    def llm(text):
+        calls.append(text)
+        return None if text == "c" else 2
+
+    cascade = CascadePredictor(FixedModel([5, 4, 3], [0.9, 0.3, 0.1]), llm)
+    out = cascade.predict(["a", "b", "c"])
+    assert calls == ["b", "c"] and cascade.api_calls == 2
+    assert [o["source"] for o in out] == ["local", "llm", "local-fallback"]
+    assert [o["predicted_stars"] for o in out] == [5, 2, 3]
+
+
+def test_evaluate_cascade_and_pick_threshold():
+    rows = evaluate_cascade(
+        local_stars=[5, 1, 3, 3], local_confidence=[0.9, 0.8, 0.2, 0.1],
+        llm_stars=[5, 1, 4, 2], actual=[5, 1, 4, 2], thresholds=(0.5, 0.85),
+    )
+    assert [r["api_calls_saved"] for r in rows] == [2, 1]
+    assert [r["cascade_accuracy"] for r in rows] == [1.0, 1.0]
+    assert pick_threshold(rows) == 0.5
+
+    # Nothing within tolerance: send everything to the LLM
+    worse = [dict(r, cascade_accuracy=0.5) for r in rows]
+    assert pick_threshold(worse) == float("inf")
+
+
+def test_default_sweep_uses_confidence_quantiles():
+    conf = np.linspace(0, 1, 11)
+    rows = evaluate_cascade(np.ones(11), conf, np.ones(11), np.ones(11))
+    assert [r["threshold"] for r in rows] == pytest.approx(np.linspace(0.1, 0.9, 9))
+
+
+def test_threshold_for_accuracy_needs_support():
+    conf = np.array([0.9] * 10 + [0.5] * 10)
+    stars = np.array([5] * 10 + [1] * 10)
+    actual = np.array([5] * 10 + [1] * 5 + [3] * 5)
+    # 0.4 keeps all 20 at 75%; 0.8 keeps 10 at 100%
+    assert threshold_for_accuracy(stars, conf, actual, 0.9, (0.4, 0.8), min_support=10) == 0.8
+    assert threshold_for_accuracy(stars, conf, actual, 0.7, (0.4, 0.8), min_support=10) == 0.4
+    assert threshold_for_accuracy(stars, conf, actual, 0.9, (0.4, 0.8), min_support=11) == float("inf")
@@ -0,0 +1,176 @@
+"""Repair index and commit behaviour of the re-enrichment job (no network)."""
+
+import copy
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("streamlit")
+pytest.importorskip("requests")
+
+from llm_utils import AI_FAILED, AI_UNAVAILABLE, ENRICHMENT_BATCH_VERSION, PROMPT_VERSIONS
+from reenrich_job import ReEnrichmentJob, build_repair_index, stale_fields
+
+
+FIELDS = list(PROMPT_VERSIONS)
+
+
+def review(rid, tagged=True, **overrides):
+    r = {
+        "id": rid,
+        "user_rating": 4,
+        "user_review": f"review {rid}",
+        "ai_response": "thanks",
+        "ai_summary": "fine",
+        "ai_recommended_action": "none",
+    }
+    if tagged:
+        r["prompt_versions"] = dict(PROMPT_VERSIONS)
+    r.update(overrides)
+    return r
+
+
+class FakeStorage:
+    def __init__(self, reviews, fail_saves=0):
+        self.reviews = reviews
+        self.fail_saves = fail_saves
+        self.saves = 0
+
+    def load_reviews(self):
+        return copy.deepcopy(self.reviews)
+
+    def update_reviews(self, mutate):
+        if self.fail_saves:
+            self.fail_saves -= 1
+            return False
+        data = self.load_reviews()
+        mutate(data)
+        self.reviews = data
+        self.saves += 1
+        return True
+
+
+class RacingStorage(FakeStorage):
+    """A customer review lands between the job's read and its write."""
+
+    def update_reviews(self, mutate):
+        stale = self.load_reviews()
+        mutate(stale)
+        # Conditional write rejected: re-read and re-apply on fresh data
+        self.reviews.append(review(99, ai_summary="customer"))
+        return super().update_reviews(mutate)
+
+
+class FakeLLM:
+    def __init__(self):
+        self.field_calls = []
+        self.batch_calls = []
+
+    def generate_field(self, field, rating, text):
+        self.field_calls.append(field)
+        return f"new {field}"
+
+    def process_reviews_batch(self, reviews, **kwargs):
+        self.batch_calls.append(len(reviews))
+        return [
+            {"ai_summary": "new ai_summary", "ai_recommended_action": "new ai_recommended_action",
+             "prompt_versions": {"ai_summary": ENRICHMENT_BATCH_VERSION,
+                                 "ai_recommended_action": ENRICHMENT_BATCH_VERSION}}
+            for _ in reviews
+        ]
+
+
+def job(storage, tmp_path, **kwargs):
+    kwargs.setdefault("rate", 0)
+    kwargs.setdefault("workers", 2)
+    kwargs.setdefault("llm", FakeLLM())
+    return ReEnrichmentJob(
+        storage=storage,
+        checkpoint_path=str(tmp_path / "checkpoint.json"),
+        retry_delay=0, **kwargs,
+    )
+
+
+def test_stale_fields_sentinels_and_old_versions():
+    assert stale_fields(review(1)) == []
+    assert stale_fields(review(1, ai_summary=AI_FAILED)) == ["ai_summary"]
+    assert stale_fields(review(1, ai_response="")) == ["ai_response"]
+    old = review(1)
+    old["prompt_versions"]["ai_recommended_action"] = "deadbeef"
+    assert stale_fields(old) == ["ai_recommended_action"]
+
+
+def test_untagged_rows_are_opt_in():
+    legacy = review(1, tagged=False)
+    assert stale_fields(legacy) == []
+    assert stale_fields(legacy, include_untagged=True) == FIELDS
+    # Sentinels are repaired either way
+    assert stale_fields(review(1, tagged=False, ai_summary=AI_UNAVAILABLE)) == ["ai_summary"]
+
+
+def test_build_repair_index_keys_by_id_or_position():
+    rows = [review(7, ai_summary=AI_FAILED), review(8)]
+    del rows[1]["id"]
+    rows[1]["ai_response"] = AI_FAILED
+    assert build_repair_index(rows) == {"7": ["ai_summary"], "pos-1": ["ai_response"]}
+
+
+def test_run_repairs_only_stale_fields(tmp_path):
+    storage = FakeStorage([review(1, ai_summary=AI_FAILED), review(2, tagged=False)])
+    stats = job(storage, tmp_path, commit_every=1).run()
+    assert stats["generated"] == stats["repaired"] == 1
+    assert storage.reviews[0]["ai_summary"] == "new ai_summary"
+    assert storage.reviews[1] == review(2, tagged=False)
+
+
+def test_summary_repairs_are_batched_and_tagged(tmp_path):
+    llm = FakeLLM()
+    storage = FakeStorage([
+        review(1, ai_summary=AI_FAILED),
+        review(2, ai_recommended_action=AI_UNAVAILABLE, ai_response=AI_FAILED),
+        review(3),
+    ])
+    stats = job(storage, tmp_path, llm=llm).run()
+    assert llm.batch_calls == [2] and llm.field_calls == ["ai_response"]
+    assert stats["repaired"] == 3
+    first, second, _ = storage.reviews
+    # Only the stale field of a batched review is written
+    assert first["ai_recommended_action"] == "none"
+    assert first["prompt_versions"]["ai_summary"] == ENRICHMENT_BATCH_VERSION
+    assert second["prompt_versions"]["ai_response"] == PROMPT_VERSIONS["ai_response"]
+    # Batch-tagged output counts as current
+    assert stale_fields(first) == [] and stale_fields(second) == []
+
+
+def test_no_batch_uses_per_field_calls(tmp_path):
+    llm = FakeLLM()
+    storage = FakeStorage([review(1, ai_summary=AI_FAILED)])
+    job(storage, tmp_path, llm=llm, batch=False).run()
+    assert llm.batch_calls == [] and llm.field_calls == ["ai_summary"]
+    assert storage.reviews[0]["prompt_versions"]["ai_summary"] == PROMPT_VERSIONS["ai_summary"]
+
+
+def test_commit_keeps_reviews_written_during_the_run(tmp_path):
+    storage = RacingStorage([review(1, ai_summary=AI_FAILED)])
+    job(storage, tmp_path).run()
+    assert [r["id"] for r in storage.reviews] == [1, 99]
+    assert storage.reviews[0]["ai_summary"] == "new ai_summary"
+    assert storage.reviews[1]["ai_summary"] == "customer"
+
+
+def test_final_commit_is_retried(tmp_path):
+    storage = FakeStorage([review(1, ai_summary=AI_FAILED)], fail_saves=2)
+    stats = job(storage, tmp_path).run()
+    assert stats["repaired"] == 1 and stats["uncommitted"] == 0
+    assert storage.reviews[0]["ai_summary"] == "new ai_summary"
+
+
+def test_failed_final_commit_is_reported(tmp_path):
+    storage = FakeStorage([review(1, ai_summary=AI_FAILED)], fail_saves=10)
+    j = job(storage, tmp_path)
+    stats = j.run()
+    assert stats["generated"] == 1
+    assert stats["repaired"] == 0
+    assert stats["uncommitted"] == 1
+    # Nothing checkpointed, so the next run tries again
+    assert j.pending(storage.load_reviews())
@@ -0,0 +1,69 @@
+"""Word-prefix search and incremental updates of ReviewSearchIndex."""
+
+from search_index import ReviewSearchIndex
+
+
+def review(text, summary=""):
+    return {"user_review": text, "ai_summary": summary}
+
+
+def build(reviews):
+    index = ReviewSearchIndex()
+    index.update(reviews)
+    return index
+
+
+def test_prefix_tokens_all_must_match_in_any_order():
+    index = build([
+        review("The service was slow"),
+        review("Great service", summary="Fast and friendly"),
+        review("Slow kitchen"),
+    ])
+    assert index.search("serv") == [0, 1]
+    assert index.search("slow SERVICE") == [0]
+    assert index.search("friendly") == [1]
+    # Word prefixes only, not arbitrary substrings
+    assert index.search("ice") == []
+
+
+def test_query_without_tokens_is_left_to_caller():
+    assert build([review("anything")]).search("!") is None
+
+
+def test_appends_and_in_place_rewrites_are_picked_up():
+    reviews = [review("cold food", summary="AI response failed."), review("nice")]
+    index = build(reviews)
+    assert index.search("failed") == [0]
+
+    reviews[0]["ai_summary"] = "Food arrived cold"
+    reviews.append(review("cold drinks"))
+    # Only the rewritten row and the new one are re-tokenized
+    assert index.update(reviews) == 2
+    assert index.search("failed") == []
+    assert index.search("cold") == [0, 2]
+    assert index.update(reviews) == 0
+
+
+def test_scattered_rewrites_keep_postings_sorted():
+    reviews = [review(f"plain row {i}") for i in range(10)]
+    index = build(reviews)
+    for pos in (7, 2, 5):
+        reviews[pos] = review("burnt toast")
+    assert index.update(reviews) == 3
+    assert index.search("burnt") == [2, 5, 7]
+    assert index.search("plain") == [0, 1, 3, 4, 6, 8, 9]
+    assert all(p == sorted(p) for p in index.postings.values())
+
+    reviews[5] = review("plain again")
+    assert index.update(reviews) == 1
+    assert index.search("burnt") == [2, 7]
+    assert index.search("plain") == [0, 1, 3, 4, 5, 6, 8, 9]
+    assert index.search("again") == [5]
+
+
+def test_shorter_or_replaced_list_rebuilds():
+    index = build([review("alpha"), review("beta"), review("gamma")])
+    index.update([review("delta")])
+    assert len(index) == 1
+    assert index.search("alpha") == []
+    assert index.search("delta") == [0]
@@ -10,6 +10,8 @@ from pathlib import Path
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+# src modules import each other by bare name, as the dashboards do
+sys.path.insert(0, str(project_root / "src"))
 
 def test_imports():
     """Test if all required modules can be imported"""
@@ -43,6 +45,13 @@ def test_imports():
         print(f"❌ Failed to import numpy: {e}")
         return False
     
+    try:
+        import scipy.sparse
+        print("✅ scipy imported successfully")
+    except ImportError as e:
+        print(f"❌ Failed to import scipy: {e}")
+        return False
+    
     try:
         import matplotlib.pyplot as plt
         print("✅ matplotlib imported successfully")
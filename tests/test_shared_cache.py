@@ -0,0 +1,105 @@
+"""Generations, scoping, TTL and schema rebuilds of the shared cache."""
+
+import sqlite3
+
+import pytest
+
+from shared_cache import SCHEMA_VERSION, SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "cache.sqlite3"))
+
+
+def test_invalidate_hides_stale_entries(cache):
+    cache.set("snapshot", "reviews.json", [1, 2])
+    assert cache.get("snapshot", "reviews.json") == [1, 2]
+    assert cache.invalidate() == 1
+    assert cache.get("snapshot", "reviews.json") is None
+
+
+def test_older_generation_does_not_overwrite_newer(cache):
+    before = cache.generation()
+    cache.invalidate()
+    cache.set("analytics", "k", "fresh")
+    # Computed from data read before the write above
+    cache.set("analytics", "k", "stale", generation=before)
+    assert cache.get("analytics", "k") == "fresh"
+
+
+def test_value_computed_across_a_write_is_not_served(cache):
+    before = cache.generation()
+    cache.invalidate()
+    cache.set("analytics", "k", "stale", generation=before)
+    assert cache.get("analytics", "k") is None
+
+
+def test_unversioned_entries_survive_invalidate(cache):
+    cache.set("llm", "prompt-hash", "reply", versioned=False)
+    cache.invalidate()
+    cache.invalidate("acme")
+    assert cache.get("llm", "prompt-hash", versioned=False) == "reply"
+
+
+def test_scopes_are_independent(cache):
+    cache.set("snapshot", "a", "A", scope="acme")
+    cache.set("snapshot", "b", "B", scope="globex")
+    cache.invalidate("acme")
+    assert cache.get("snapshot", "a") is None
+    assert cache.get("snapshot", "b") == "B"
+    assert cache.generation("acme") == 1 and cache.generation("globex") == 0
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    import shared_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+    cache.set("businesses", "all", ["acme"])
+    now[0] += 59
+    assert cache.get("businesses", "all", ttl=60) == ["acme"]
+    now[0] += 2
+    assert cache.get("businesses", "all", ttl=60) is None
+    assert cache.get("businesses", "all") == ["acme"]
+
+
+def test_old_schema_is_rebuilt(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE meta (k TEXT PRIMARY KEY, v INTEGER);"
+        "CREATE TABLE entries (namespace TEXT, key TEXT, value BLOB);"
+        "PRAGMA user_version = 1;"
+    )
+    conn.close()
+
+    cache = SharedCache(path)
+    assert cache._conn().execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    cache.set("snapshot", "k", "v", scope="acme")
+    assert cache.get("snapshot", "k") == "v"
+
+    # Reopening a current file keeps its contents
+    assert SharedCache(path).get("snapshot", "k") == "v"
+
+
+def test_llm_namespace_is_bounded(cache, monkeypatch):
+    import shared_cache
+
+    monkeypatch.setattr(shared_cache, "NAMESPACE_LIMITS", {"llm": (100, 3)})
+    monkeypatch.setattr(shared_cache, "PRUNE_EVERY", 5)
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, "time", lambda: now[0])
+
+    for i in range(5):
+        now[0] += 1
+        cache.set("llm", f"k{i}", i, versioned=False)
+    # The fifth write pruned down to the newest 3
+    assert [cache.get("llm", f"k{i}", versioned=False) for i in range(5)] == [None, None, 2, 3, 4]
+
+    # Past max age: ignored by get, removed by prune
+    now[0] += 200
+    assert cache.get("llm", "k4", versioned=False) is None
+    cache.prune("llm")
+    count = cache._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+    assert count == 0
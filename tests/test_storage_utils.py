@@ -0,0 +1,117 @@
+"""Business partitions in local storage mode (no network)."""
+
+import threading
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("requests")
+
+import storage_utils
+from storage_utils import (
+    FILE_PATH,
+    business_file_path,
+    create_business,
+    get_storage,
+    list_businesses,
+)
+
+
+@pytest.fixture(autouse=True)
+def local_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage_utils, "LOCAL_STORAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("FYND_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    return tmp_path
+
+
+def test_business_file_path():
+    assert business_file_path() == FILE_PATH
+    assert business_file_path("acme-1") == f"businesses/acme-1/{FILE_PATH}"
+    for bad in ("../etc", "Acme", "a/b", "", "-x", "x" * 65):
+        with pytest.raises(ValueError):
+            business_file_path(bad)
+
+
+def test_create_and_list_businesses():
+    assert list_businesses() == []
+    assert create_business("globex") and create_business("acme")
+    assert list_businesses() == ["acme", "globex"]
+    # Idempotent, keeps existing reviews
+    get_storage("acme").add_review({"user_rating": 5, "user_review": "hi"})
+    assert create_business("acme")
+    assert len(get_storage("acme").load_reviews()) == 1
+
+
+def test_failed_listing_serves_last_good_ids_without_rescanning(monkeypatch):
+    create_business("acme")
+    assert list_businesses() == ["acme"]
+
+    scans = []
+
+    def outage():
+        scans.append(1)
+        return None
+
+    monkeypatch.setattr(storage_utils, "_scan_businesses", outage)
+    # A save marks the listing stale, so the next call rescans
+    get_storage("acme").add_review({"user_rating": 4, "user_review": "ok"})
+    for _ in range(3):
+        assert list_businesses() == ["acme"]
+    # One failed scan, then the failure is cached for LISTING_RETRY_AFTER
+    assert len(scans) == 1
+
+
+def test_partitions_are_isolated():
+    create_business("acme")
+    create_business("globex")
+    get_storage("acme").add_review({"user_rating": 1, "user_review": "bad"})
+    assert get_storage("globex").load_reviews() == []
+    assert get_storage().load_reviews() == []
+
+
+def test_concurrent_add_review_keeps_every_review():
+    create_business("acme")
+
+    def submit(worker):
+        storage = get_storage("acme")
+        for i in range(5):
+            assert storage.add_review({"user_rating": 5, "user_review": f"{worker}-{i}"})
+
+    threads = [threading.Thread(target=submit, args=(w,)) for w in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    reviews = get_storage("acme").load_reviews()
+    assert len(reviews) == 30
+    assert sorted(r["id"] for r in reviews) == list(range(1, 31))
+
+
+def test_github_conflict_rereads_and_reapplies(monkeypatch):
+    monkeypatch.setattr(storage_utils, "LOCAL_STORAGE_DIR", None)
+    monkeypatch.setattr(storage_utils.time, "sleep", lambda s: None)
+    remote = {"data": [{"id": 1}], "sha": "a"}
+    puts = []
+
+    def fetch_latest(self):
+        return [dict(r) for r in remote["data"]], remote["sha"]
+
+    def put(self, data, sha):
+        puts.append(sha)
+        if len(puts) == 1:
+            # Another worker wrote in between
+            remote["data"], remote["sha"] = remote["data"] + [{"id": 2}], "b"
+            return 409
+        assert sha == remote["sha"]
+        remote["data"], remote["sha"] = data, "c"
+        return 200
+
+    monkeypatch.setattr(storage_utils.CloudStorage, "_fetch_latest", fetch_latest)
+    monkeypatch.setattr(storage_utils.CloudStorage, "_put", put)
+
+    entry = {"user_review": "new"}
+    assert get_storage("acme").add_review(entry)
+    assert puts == ["a", "b"]
+    assert [r["id"] for r in remote["data"]] == [1, 2, 3]
+    assert entry["id"] == 3
@@ -10,8 +10,8 @@ from pathlib import Path
 # Add src directory to path
 sys.path.append(str(Path(__file__).parent / 'src'))
 
-from storage_utils import get_storage
-from llm_utils import get_llm_manager
+from storage_utils import get_storage, list_businesses
+from llm_utils import get_llm_manager, PROMPT_VERSIONS
 
 # Page configuration
 st.set_page_config(
@@ -21,8 +21,15 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Business comes from the link customers are given (?business=<id>);
+# only registered businesses accept reviews, so a link cannot create one
+business_id = st.query_params.get("business")
+if business_id is not None and business_id not in list_businesses():
+    st.error("❌ Unknown business link.")
+    st.stop()
+
 # Initialize services
-storage = get_storage()
+storage = get_storage(business_id)
 llm = get_llm_manager()
 
 # Custom CSS
@@ -85,6 +92,7 @@ if st.button("🚀 Submit Review", type="primary"):
                 "ai_response": ai_results["ai_response"],
                 "ai_summary": ai_results["ai_summary"],
                 "ai_recommended_action": ai_results["ai_recommended_action"],
+                "prompt_versions": dict(PROMPT_VERSIONS),
                 "timestamp": st.session_state.get("timestamp", "")
             }
 